@@ -31,27 +31,427 @@ import can
 import time
 import os
 import json
+import hashlib
+import heapq
+import socket
+import select
+import struct
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict
+from itertools import islice
+from operator import itemgetter
 import argparse
 import sys
 
+# Use orjson for capture file headers and legacy JSON captures when it is installed
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+    _json_loads = json.loads
+
+# Parquet capture files are optional and need pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Bit flags stored per frame in a capture's 'flags' array
+FLAG_EXTENDED_ID = 0x01
+FLAG_REMOTE_FRAME = 0x02
+FLAG_ERROR_FRAME = 0x04
+
+# Capture metadata fields, saved on a placeholder message at the start of legacy JSON capture files
+META_KEYS = ('action_timestamps', 'toggle_events', 'initial_state', 'toggled_state', 'capture_type')
+
+# Binary capture files: one JSON header line followed by fixed-size frame records
+# Linux struct can_frame: 32-bit ID with flag bits, length, 3 padding bytes, 8 data bytes
+CAN_FRAME = struct.Struct('=IB3x8s')
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+SO_RCVBUFFORCE = getattr(socket, 'SO_RCVBUFFORCE', 33)
+SO_TIMESTAMPNS_NEW = 64  # Kernel receive timestamps as a 64-bit struct timespec (Linux 5.1+)
+TIMESPEC = struct.Struct('=qq')
+TIMESTAMP_ANCILLARY_SIZE = socket.CMSG_SPACE(TIMESPEC.size)
+RECEIVE_BUFFER_SIZE = 8 * 1024 * 1024  # Requested kernel receive buffer for CAN sockets
+CAPTURE_EXTENSION = '.can'
+PARQUET_EXTENSION = '.parquet'
+COMPARE_CACHE_SIZE = 8  # Number of compare_captures results to keep
+EXPECTED_MESSAGE_RATE = 4000  # Messages per second used to size capture buffers
+PROGRESS_INTERVAL = 0.25  # Seconds between capture progress updates
+RECEIVE_BATCH_SIZE = 256  # Most messages taken per receive call
+CAPTURE_FORMAT_VERSION = 1
+PAYLOAD_KEY_DTYPE = np.dtype([('payload', '<u8'), ('dlc', 'u1')])  # See _payload_keys
+CAPTURE_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('arbitration_id', '<u4'),
+    ('dlc', 'u1'),
+    ('flags', 'u1'),
+    ('data', 'u1', (8,)),
+])
+
+# Menus of the interactive session, each printed with a single call
+MAIN_MENU = """
+MAIN MENU:
+1. Establish baseline (capture normal traffic)
+2. Capture traffic during specific action
+3. Analyze differences between captures
+4. Save/load captures
+5. Visualize message timeline
+6. Capture binary toggle action
+7. Analyze binary toggle capture
+0. Exit"""
+SAVE_LOAD_MENU = """
+SAVE/LOAD MENU:
+1. List available saved captures
+2. Load a capture from file
+3. Return to main menu"""
+
+
+def _to_soa(messages, start_time=None):
+    """
+    Convert a sequence of CAN messages into parallel (structure-of-arrays) NumPy arrays.
+
+    Payloads are zero-padded to 8 bytes so that every row of ``data`` has the same
+    width; the real payload length is kept in ``dlc``.
+
+    Args:
+        messages: Sequence of python-can Message (or Message-like) objects
+        start_time: Optional capture start time; if given, timestamps are made relative
+            to it and messages received before it are dropped
+
+    Returns:
+        Capture dictionary with 'timestamp', 'arbitration_id', 'dlc', 'flags' and
+        'data' arrays plus an empty 'meta' dictionary
+    """
+    count = len(messages)
+    payloads = bytearray(b''.join(bytes(msg.data[:8]).ljust(8, b'\0') for msg in messages))
+    capture = {
+        'timestamp': np.fromiter((msg.timestamp for msg in messages), dtype=np.float64, count=count),
+        'arbitration_id': np.fromiter((msg.arbitration_id for msg in messages), dtype=np.uint32, count=count),
+        'dlc': np.fromiter((min(msg.dlc, 8) for msg in messages), dtype=np.uint8, count=count),
+        'flags': np.fromiter(
+            (
+                (FLAG_EXTENDED_ID if msg.is_extended_id else 0)
+                | (FLAG_REMOTE_FRAME if msg.is_remote_frame else 0)
+                | (FLAG_ERROR_FRAME if msg.is_error_frame else 0)
+                for msg in messages
+            ),
+            dtype=np.uint8,
+            count=count
+        ),
+        'data': np.frombuffer(payloads, dtype=np.uint8).reshape(-1, 8),
+        'meta': {},
+    }
+    if start_time is not None:
+        _make_relative(capture, start_time)
+    return capture
+
+
+def _make_relative(capture, start_time):
+    """
+    Make capture timestamps relative to the capture start, in place.
+
+    Messages received before the start (frames already queued in the socket
+    when the capture started) are dropped.
+
+    Args:
+        capture: Capture dictionary (see _to_soa)
+        start_time: Capture start time, on the same clock as the message timestamps
+    """
+    capture['timestamp'] -= start_time
+    keep = capture['timestamp'] >= 0
+    if not keep.all():
+        for key in CAPTURE_RECORD_DTYPE.names:
+            capture[key] = capture[key][keep]
+
+
+class _CaptureBuffer:
+    """
+    Preallocated NumPy arrays that received messages are written into during a capture.
+
+    The arrays double in size when full, so a capture does not keep every
+    python-can Message object alive until it ends.
+    """
+
+    def __init__(self, size=4096):
+        """
+        Initialize the buffer.
+
+        Args:
+            size: Initial number of messages to allocate room for
+        """
+        self.count = 0
+        self.timestamp = np.empty(size, dtype=np.float64)
+        self.arbitration_id = np.empty(size, dtype=np.uint32)
+        self.dlc = np.empty(size, dtype=np.uint8)
+        self.flags = np.empty(size, dtype=np.uint8)
+        self.data = np.zeros((size, 8), dtype=np.uint8)
+
+    def _grow(self):
+        """Double the size of the arrays, keeping the messages written so far."""
+        for key in CAPTURE_RECORD_DTYPE.names:
+            old = getattr(self, key)
+            new = np.zeros((len(old) * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, key, new)
+
+    def append(self, msg):
+        """
+        Write a received message into the next row.
+
+        Args:
+            msg: python-can Message
+        """
+        if self.count == len(self.timestamp):
+            self._grow()
+        n = self.count
+        payload = msg.data[:8]
+        self.timestamp[n] = msg.timestamp
+        self.arbitration_id[n] = msg.arbitration_id
+        self.dlc[n] = min(msg.dlc, 8)
+        self.flags[n] = (
+            (FLAG_EXTENDED_ID if msg.is_extended_id else 0)
+            | (FLAG_REMOTE_FRAME if msg.is_remote_frame else 0)
+            | (FLAG_ERROR_FRAME if msg.is_error_frame else 0)
+        )
+        self.data[n, :len(payload)] = np.frombuffer(bytes(payload), dtype=np.uint8)
+        self.count = n + 1
+
+    def append_frame(self, timestamp, can_id, dlc, data):
+        """
+        Write a raw SocketCAN frame into the next row.
+
+        Args:
+            timestamp: Receive time of the frame
+            can_id: can_id field of the frame, including the EFF/RTR/ERR flag bits
+            dlc: Length field of the frame
+            data: The frame's 8 data bytes
+        """
+        if self.count == len(self.timestamp):
+            self._grow()
+        n = self.count
+        dlc = min(dlc, 8)
+        self.timestamp[n] = timestamp
+        self.arbitration_id[n] = can_id & (0x1FFFFFFF if can_id & CAN_EFF_FLAG else 0x7FF)
+        self.dlc[n] = dlc
+        self.flags[n] = (
+            (FLAG_EXTENDED_ID if can_id & CAN_EFF_FLAG else 0)
+            | (FLAG_REMOTE_FRAME if can_id & CAN_RTR_FLAG else 0)
+            | (FLAG_ERROR_FRAME if can_id & CAN_ERR_FLAG else 0)
+        )
+        self.data[n, :dlc] = np.frombuffer(data, dtype=np.uint8, count=dlc)
+        self.count = n + 1
+
+    def to_capture(self, start_time):
+        """
+        Build a capture dictionary from the messages written so far.
+
+        Args:
+            start_time: Capture start time; timestamps are made relative to it
+
+        Returns:
+            Capture dictionary (see _to_soa)
+        """
+        capture = {key: getattr(self, key)[:self.count].copy() for key in CAPTURE_RECORD_DTYPE.names}
+        capture['meta'] = {}
+        _make_relative(capture, start_time)
+        return capture
+
+
+def _payload_keys(capture, indices):
+    """
+    Get payload keys for the given rows of a capture.
+
+    Each zero-padded 8-byte payload is packed into a single uint64 and paired
+    with its DLC, so payloads of different lengths stay distinct (``01`` is not
+    ``01 00``), just as they would as bytes.
+
+    Args:
+        capture: Capture dictionary (see _to_soa)
+        indices: Row indices to consider (or a slice)
+
+    Returns:
+        Array of PAYLOAD_KEY_DTYPE keys, one per row
+    """
+    keys = np.empty(len(capture['dlc'][indices]), dtype=PAYLOAD_KEY_DTYPE)
+    keys['payload'] = capture['data'].view('<u8').reshape(-1)[indices]
+    keys['dlc'] = capture['dlc'][indices]
+    return keys
+
+
+def _unique_payloads(capture, indices):
+    """
+    Find the distinct payloads among the given rows of a capture.
+
+    Args:
+        capture: Capture dictionary (see _to_soa)
+        indices: Row indices to consider
+
+    Returns:
+        Sorted array of distinct PAYLOAD_KEY_DTYPE keys (see _payload_keys)
+    """
+    return np.unique(_payload_keys(capture, indices))
+
+
+def _payload_bytes(keys):
+    """
+    Unpack payload keys (see _payload_keys) into bytes objects.
+
+    Args:
+        keys: Array of PAYLOAD_KEY_DTYPE keys
+
+    Returns:
+        List of payloads as bytes, trimmed to their DLC
+    """
+    packed = keys['payload'].astype('<u8').tobytes()
+    return [packed[i * 8:i * 8 + dlc] for i, dlc in enumerate(keys['dlc'].tolist())]
+
+
+def _compare_id_groups(action, baseline, action_name, base_duration, action_duration, action_times):
+    """
+    Compare the messages of an action capture with a baseline, ID by ID.
+
+    This is the core of CANActionAnalyzer.compare_captures; it only needs the
+    message arrays.
+
+    Args:
+        action: Capture dictionary of the action
+        baseline: Capture dictionary of the baseline
+        action_name: Name of the action capture
+        base_duration: Duration of the baseline capture in seconds
+        action_duration: Duration of the action capture in seconds
+        action_times: Array of action timestamps, or None if not a multi-action capture
+
+    Returns:
+        Dictionary of message IDs and their differences
+    """
+    # Put both captures' IDs into one shared set of IDs with a single np.unique;
+    # the inverse gives each message's position in that set
+    base_count_total = len(baseline['arbitration_id'])
+    all_ids, inverse = np.unique(
+        np.concatenate([baseline['arbitration_id'], action['arbitration_id']]),
+        return_inverse=True
+    )
+    base_inverse = inverse[:base_count_total]
+    action_inverse = inverse[base_count_total:]
+    base_counts = np.bincount(base_inverse, minlength=len(all_ids))
+    action_counts = np.bincount(action_inverse, minlength=len(all_ids))
+    
+    # Calculate message frequency (messages per second) and frequency changes for all IDs
+    base_freq = base_counts / base_duration
+    action_freq = action_counts / action_duration
+    freq_change_pct = np.full(len(all_ids), np.inf)
+    np.divide((action_freq - base_freq) * 100, base_freq, out=freq_change_pct, where=base_freq > 0)
+    
+    # Identify new or different messages
+    is_new = (base_counts == 0) & (action_counts > 0)
+    has_freq_change = np.abs(freq_change_pct) > 20  # 20% threshold
+    
+    # Find IDs with payloads that never appear for that ID in the baseline
+    pair_dtype = np.dtype([('id', 'u4'), ('payload', 'u8'), ('dlc', 'u1')])
+    base_pairs = np.empty(base_count_total, dtype=pair_dtype)
+    base_pairs['id'] = base_inverse
+    base_keys = _payload_keys(baseline, slice(None))
+    base_pairs['payload'] = base_keys['payload']
+    base_pairs['dlc'] = base_keys['dlc']
+    action_pairs = np.empty(len(action_inverse), dtype=pair_dtype)
+    action_pairs['id'] = action_inverse
+    action_keys = _payload_keys(action, slice(None))
+    action_pairs['payload'] = action_keys['payload']
+    action_pairs['dlc'] = action_keys['dlc']
+    new_pair = ~np.isin(action_pairs, base_pairs)
+    has_new_payloads = np.bincount(action_inverse[new_pair], minlength=len(all_ids)) > 0
+    
+    # Row indices of each ID in time order, as contiguous runs of a sorted index
+    base_order = np.argsort(base_inverse, kind='stable')
+    action_order = np.argsort(action_inverse, kind='stable')
+    base_starts = np.cumsum(base_counts) - base_counts
+    action_starts = np.cumsum(action_counts) - action_counts
+    window = 1.0  # 1 second window around each action
+    
+    # Only IDs that differ in some way need their details worked out
+    differences = {}
+    for i in np.flatnonzero(is_new | has_freq_change | has_new_payloads).tolist():
+        msg_id = int(all_ids[i])
+        base_count = int(base_counts[i])
+        action_count = int(action_counts[i])
+        base_indices = base_order[base_starts[i]:base_starts[i] + base_count]
+        action_indices = action_order[action_starts[i]:action_starts[i] + action_count]
+        
+        # Check for data pattern changes
+        base_payloads = _unique_payloads(baseline, base_indices)
+        action_payloads = _unique_payloads(action, action_indices)
+        new_payloads = action_payloads[~np.isin(action_payloads, base_payloads, assume_unique=True)]
+        
+        # Check for correlation with action timestamps if multi-action capture
+        action_correlated = False
+        if action_times is not None and action_count:
+            # Get message timestamps (already in time order)
+            msg_timestamps = action['timestamp'][action_indices]
+            
+            # Check if messages occur close to action timestamps, using the
+            # nearest message on either side of each action
+            idx = np.searchsorted(msg_timestamps, action_times)
+            after = msg_timestamps[np.minimum(idx, len(msg_timestamps) - 1)]
+            before = msg_timestamps[np.maximum(idx - 1, 0)]
+            nearest = np.minimum(np.abs(after - action_times), np.abs(before - action_times))
+            correlation_count = np.count_nonzero(nearest < window)
+            
+            # Consider correlated if messages appear near most action timestamps
+            if correlation_count >= len(action_times) * 0.5:  # At least 50% of actions
+                action_correlated = True
+        
+        differences[msg_id] = {
+            'msg_id': hex(msg_id),
+            'is_new': bool(is_new[i]),
+            'base_count': base_count,
+            'action_count': action_count,
+            'freq_change_pct': float(freq_change_pct[i]),
+            'new_payloads': _payload_bytes(new_payloads),
+            'baseline_payloads': _payload_bytes(base_payloads),
+            'action_payloads': _payload_bytes(action_payloads),
+            'action_name': action_name,
+            'action_correlated': action_correlated,
+        }
+    
+    return differences
+
 
 class CANActionAnalyzer:
-    def __init__(self, can_interface, sample_rate=0.001):
+    def __init__(self, can_interface, sample_rate=0.001, use_parquet=False, use_raw_socket=False):
         """
         Initialize the CAN bus analyzer.
 
         Args:
             can_interface: CAN interface name (required)
             sample_rate: Time between CAN message reads in seconds (default: 0.001)
+            use_parquet: Save captures as Parquet files instead of .can files (default: False)
+            use_raw_socket: Capture from a raw SocketCAN socket instead of through
+                python-can (Linux only, default: False)
         """
         self.can_interface = can_interface
         self.sample_rate = sample_rate
+        self.use_parquet = use_parquet
+        self.use_raw_socket = use_raw_socket
         self.bus = None
+        self.reader = None
+        self.notifier = None
+        self.raw_socket = None
+        self.frame_buffer = bytearray(CAN_FRAME.size)
+        self.filtered = False
         self.captures = {}
+        self.capture_digests = {}  # Content hash per capture name, see _capture_digest
+        self.id_indexes = {}  # Rows of each message ID per capture name, see _id_index
+        self.compare_cache = OrderedDict()  # Recent compare_captures results
         self.sessions_dir = "can_sessions"
         
         # Create directory for saving captured data
@@ -69,18 +469,201 @@ class CANActionAnalyzer:
                 bustype='socketcan'
             )
             print(f"Successfully connected to {self.can_interface}")
+            # Raw socket captures read their own socket, enlarged in _start_reader
+            if not self.use_raw_socket and getattr(self.bus, 'socket', None) is not None:
+                self._set_receive_buffer(self.bus.socket)
             return True
         except Exception as e:
             print(f"Error connecting to CAN bus: {e}")
             return False
 
+    def _set_receive_buffer(self, sock):
+        """
+        Enlarge a socket's kernel receive buffer so frames are not dropped while
+        the capture loop is busy printing or plotting.
+
+        Args:
+            sock: SocketCAN socket
+        """
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        if actual < RECEIVE_BUFFER_SIZE:
+            # SO_RCVBUF is capped by net.core.rmem_max; SO_RCVBUFFORCE is not, but needs CAP_NET_ADMIN
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, RECEIVE_BUFFER_SIZE)
+                actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            except OSError:
+                pass
+        if actual < RECEIVE_BUFFER_SIZE:
+            print(f"Warning: socket receive buffer is only {actual // 1024} KB "
+                  f"(requested {RECEIVE_BUFFER_SIZE // 1024} KB); raise net.core.rmem_max or run as root")
+        else:
+            print(f"Socket receive buffer: {actual // 1024} KB")
+
     def disconnect(self):
         """Disconnect from the CAN bus interface."""
+        self._stop_reader()
         if self.bus:
             self.bus.shutdown()
             print(f"Disconnected from {self.can_interface}")
 
-    def capture_messages(self, duration, action_name="baseline", show_progress=True, repeat_count=1, repeat_interval=5):
+    def _start_reader(self, can_filters=None):
+        """
+        Start receiving for a capture.
+
+        With use_raw_socket a raw SocketCAN socket is opened; otherwise a background
+        notifier drains the bus into a buffered reader.
+
+        Args:
+            can_filters: Optional list of python-can style filter dictionaries
+
+        Returns:
+            Receive function for this capture, taking the _CaptureBuffer to write into;
+            choosing it here keeps the raw socket check out of the per-message loop
+        """
+        if self.use_raw_socket:
+            self.raw_socket = socket.socket(socket.PF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+            try:
+                if can_filters:
+                    # struct can_filter entries; matching extended IDs also requires the EFF flag
+                    raw_filters = b''.join(
+                        struct.pack(
+                            '=II',
+                            f['can_id'] | (CAN_EFF_FLAG if f['extended'] else 0),
+                            f['can_mask'] | CAN_EFF_FLAG
+                        )
+                        for f in can_filters
+                    )
+                    self.raw_socket.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, raw_filters)
+                self.raw_socket.bind((self.can_interface,))
+                self._set_receive_buffer(self.raw_socket)
+                self.raw_socket.setblocking(False)
+            except Exception:
+                # e.g. no such interface; don't leave the socket open behind the error
+                self.raw_socket.close()
+                self.raw_socket = None
+                raise
+            try:
+                self.raw_socket.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS_NEW, 1)
+            except OSError:
+                # Older kernels; stamp frames when they are read instead
+                return self._receive_frame
+            return self._receive_stamped_frame
+            
+        if can_filters:
+            self.bus.set_filters(can_filters)
+            self.filtered = True
+        self.reader = can.BufferedReader()
+        self.notifier = can.Notifier(self.bus, [self.reader])
+        return self._receive_message
+
+    def _receive_frame(self, buffer):
+        """
+        Receive frames from the raw socket into a capture buffer, waiting up to
+        sample_rate seconds for the first one.
+
+        Everything already queued on the socket (up to RECEIVE_BATCH_SIZE frames) is read
+        per call, so a burst costs one wait instead of one per frame.
+
+        Args:
+            buffer: _CaptureBuffer to write the frames into
+        """
+        if not select.select([self.raw_socket], [], [], self.sample_rate)[0]:
+            return
+        for _ in range(RECEIVE_BATCH_SIZE):
+            try:
+                self.raw_socket.recv_into(self.frame_buffer)
+            except BlockingIOError:
+                return
+            can_id, dlc, data = CAN_FRAME.unpack_from(self.frame_buffer)
+            buffer.append_frame(time.time(), can_id, dlc, data)
+
+    def _receive_stamped_frame(self, buffer):
+        """
+        Receive frames from the raw socket into a capture buffer like _receive_frame,
+        but timestamped by the kernel when each frame arrived rather than when it
+        was read, so frames read in one batch keep their real spacing.
+
+        Args:
+            buffer: _CaptureBuffer to write the frames into
+        """
+        if not select.select([self.raw_socket], [], [], self.sample_rate)[0]:
+            return
+        for _ in range(RECEIVE_BATCH_SIZE):
+            try:
+                _, ancdata, _, _ = self.raw_socket.recvmsg_into([self.frame_buffer], TIMESTAMP_ANCILLARY_SIZE)
+            except BlockingIOError:
+                return
+            # Use the kernel timestamp only if it is the one we asked for and complete
+            timestamp = time.time()
+            for level, kind, cmsg_data in ancdata:
+                if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS_NEW and len(cmsg_data) >= TIMESPEC.size:
+                    seconds, nanoseconds = TIMESPEC.unpack_from(cmsg_data)
+                    timestamp = seconds + nanoseconds * 1e-9
+                    break
+            can_id, dlc, data = CAN_FRAME.unpack_from(self.frame_buffer)
+            buffer.append_frame(timestamp, can_id, dlc, data)
+
+    def _receive_message(self, buffer):
+        """
+        Receive messages from the buffered reader into a capture buffer, waiting up
+        to sample_rate seconds for the first one.
+
+        Messages already waiting in the reader (up to RECEIVE_BATCH_SIZE) are taken
+        in the same call, so the capture loop checks the clock and prompts once per
+        batch rather than once per message.
+
+        Args:
+            buffer: _CaptureBuffer to write the messages into
+        """
+        msg = self.reader.get_message(timeout=self.sample_rate)
+        if msg is None:
+            return
+        buffer.append(msg)
+        for _ in range(RECEIVE_BATCH_SIZE - 1):
+            msg = self.reader.get_message(timeout=0)
+            if msg is None:
+                return
+            buffer.append(msg)
+
+    def _stop_reader(self):
+        """
+        Stop receiving for a capture started by _start_reader.
+
+        Returns:
+            List of messages that were received but not yet read from the buffer
+        """
+        remaining = []
+        if self.raw_socket is not None:
+            self.raw_socket.close()
+            self.raw_socket = None
+        if self.notifier:
+            self.notifier.stop()
+            msg = self.reader.get_message(timeout=0)
+            while msg is not None:
+                remaining.append(msg)
+                msg = self.reader.get_message(timeout=0)
+            self.notifier = None
+            self.reader = None
+        if self.filtered:
+            self.bus.set_filters(None)
+            self.filtered = False
+        return remaining
+
+    def _countdown(self, seconds=3):
+        """
+        Count down to the start of a capture on a single, updating line.
+
+        Args:
+            seconds: Number of seconds to count down
+        """
+        for i in range(seconds, 0, -1):
+            sys.stdout.write(f"\rStarting capture in {i}...")
+            sys.stdout.flush()
+            time.sleep(1)
+        sys.stdout.write("\n")
+
+    def capture_messages(self, duration, action_name="baseline", show_progress=True, repeat_count=1, repeat_interval=5, id_filter=None):
         """
         Capture CAN messages for a specified duration.
 
@@ -90,13 +673,15 @@ class CANActionAnalyzer:
             show_progress: Whether to show a progress indicator
             repeat_count: Number of times to repeat the action during capture
             repeat_interval: Time in seconds between repeated actions
+            id_filter: Optional list of arbitration IDs to capture; other IDs are
+                dropped by the kernel before they reach this process
 
         Returns:
-            List of captured CAN messages
+            Capture dictionary of message arrays (see _to_soa)
         """
         if not self.bus:
             if not self.connect():
-                return []
+                return _to_soa([])
 
         # Calculate total capture duration based on repeats
         total_duration = duration
@@ -110,9 +695,7 @@ class CANActionAnalyzer:
             print("Please perform the action when prompted...")
         
         # Countdown before starting capture
-        for i in range(3, 0, -1):
-            print(f"Starting capture in {i}...")
-            time.sleep(1)
+        self._countdown()
         
         # For baseline, no action prompts needed
         if action_name == "baseline":
@@ -120,111 +703,161 @@ class CANActionAnalyzer:
         else:
             print(f"NOW! Perform the '{action_name}' action (1 of {repeat_count})!")
         
-        # Capture messages
-        messages = []
+        # Capture messages into arrays sized for the expected bus load
+        buffer = _CaptureBuffer(max(4096, int(total_duration * EXPECTED_MESSAGE_RATE)))
         action_timestamps = []  # Store when each action was performed
+        # Only let the IDs of interest through the socket
+        can_filters = None
+        if id_filter:
+            can_filters = [
+                {'can_id': i, 'can_mask': 0x1FFFFFFF, 'extended': True} if i > 0x7FF
+                else {'can_id': i, 'can_mask': 0x7FF, 'extended': False}
+                for i in id_filter
+            ]
+        
+        # Loop timing uses a single monotonic clock read per iteration; the wall-clock
+        # start time is only needed to offset the receive timestamps from the bus, and
+        # is taken before receiving starts so no received frame comes before it
         start_time = time.time()
-        end_time = start_time + total_duration
-        next_action_time = start_time + duration  # Time for next action prompt
+        start_ns = time.monotonic_ns()
+        end_ns = start_ns + int(total_duration * 1e9)
+        next_action_ns = start_ns + int(duration * 1e9)  # Time for next action prompt
+        next_progress_ns = start_ns + int(PROGRESS_INTERVAL * 1e9)  # Time for next progress update
         action_count = 1
         
+        # Receive in a background thread (or from a raw socket) so the kernel buffer
+        # keeps being drained while this loop handles prompts and progress output
+        receive = self._start_reader(can_filters)
+        
         try:
-            while time.time() < end_time:
-                current_time = time.time()
+            while True:
+                now = time.monotonic_ns()
+                if now >= end_ns:
+                    break
                 
                 # Prompt for next action if needed
-                if action_name != "baseline" and repeat_count > 1 and action_count < repeat_count and current_time >= next_action_time:
+                if action_name != "baseline" and repeat_count > 1 and action_count < repeat_count and now >= next_action_ns:
                     action_count += 1
                     print(f"\nNOW! Perform the '{action_name}' action again ({action_count} of {repeat_count})!")
-                    action_timestamps.append(current_time - start_time)
-                    next_action_time = current_time + repeat_interval
+                    action_timestamps.append((now - start_ns) * 1e-9)
+                    next_action_ns = now + int(repeat_interval * 1e9)
                 
-                msg = self.bus.recv(timeout=self.sample_rate)
-                if msg:
-                    # Store message with timestamp relative to start
-                    msg.timestamp = current_time - start_time
-                    messages.append(msg)
+                receive(buffer)
                 
-                # Show progress
-                if show_progress and len(messages) % 100 == 0:
-                    elapsed = current_time - start_time
+                # Show progress a few times a second however busy the bus is; the
+                # line is flushed so it shows up on a line-buffered terminal
+                if show_progress and now >= next_progress_ns:
+                    next_progress_ns = now + int(PROGRESS_INTERVAL * 1e9)
+                    elapsed = (now - start_ns) * 1e-9
                     progress = int((elapsed / total_duration) * 100)
-                    print(f"\rProgress: {progress}% ({len(messages)} messages)", end="")
+                    sys.stdout.write(f"\rProgress: {progress}% ({buffer.count} messages)")
+                    sys.stdout.flush()
                     
         except KeyboardInterrupt:
             print("\nCapture interrupted by user.")
+        finally:
+            for msg in self._stop_reader():
+                buffer.append(msg)
         
-        print(f"\nCapture complete. Collected {len(messages)} messages across {action_count} action(s).")
+        # Store the capture with the action name; the receive timestamps from the
+        # bus are made relative to the start of the capture in one pass
+        capture = buffer.to_capture(start_time)
+        self.captures[action_name] = capture
+        self.capture_digests.pop(action_name, None)
+        self.id_indexes.pop(action_name, None)
         
-        # Store the capture with the action name
-        self.captures[action_name] = messages
+        print(f"\nCapture complete. Collected {len(capture['timestamp'])} messages across {action_count} action(s).")
         
         # Store action timestamps as metadata in the capture
         if action_name != "baseline" and repeat_count > 1:
-            # Create a simple metadata message at the start
-            if messages:
-                meta_msg = type('Message', (), {})()
-                meta_msg.timestamp = 0
-                meta_msg.arbitration_id = 0
-                meta_msg.dlc = 8
-                meta_msg.data = bytes([0, 0, 0, 0, 0, 0, 0, 0])
-                meta_msg.is_extended_id = False
-                meta_msg.is_remote_frame = False
-                meta_msg.is_error_frame = False
-                meta_msg.action_timestamps = [0] + action_timestamps  # Add first action at time 0
-                messages.insert(0, meta_msg)
+            if len(capture['timestamp']):
+                capture['meta']['action_timestamps'] = [0] + action_timestamps  # Add first action at time 0
                 print(f"Recorded timestamps for {action_count} actions.")
         
-        return messages
+        return capture
 
     def save_capture(self, action_name):
         """
         Save a specific capture to a file.
 
+        The file starts with a single JSON header line (format version, message
+        count and capture metadata) followed by the messages as fixed-size binary
+        records (see CAPTURE_RECORD_DTYPE).
+
         Args:
             action_name: Name of the capture to save
         """
         if action_name not in self.captures:
             print(f"No capture found with name '{action_name}'")
             return
+        
+        if self.use_parquet:
+            self.save_capture_parquet(action_name)
+            return
             
-        # Convert CAN messages to serializable format
-        serializable_msgs = []
-        for msg in self.captures[action_name]:
-            msg_dict = {
-                'timestamp': msg.timestamp,
-                'arbitration_id': msg.arbitration_id,
-                'dlc': msg.dlc,
-                'data': list(msg.data),
-                'is_extended_id': msg.is_extended_id,
-                'is_remote_frame': msg.is_remote_frame,
-                'is_error_frame': msg.is_error_frame,
-            }
-            # Add action timestamps if they exist (for multi-action captures)
-            if hasattr(msg, 'action_timestamps'):
-                msg_dict['action_timestamps'] = msg.action_timestamps
-                
-            # Add binary toggle metadata if they exist
-            if hasattr(msg, 'toggle_events'):
-                msg_dict['toggle_events'] = msg.toggle_events
-            if hasattr(msg, 'initial_state'):
-                msg_dict['initial_state'] = msg.initial_state
-            if hasattr(msg, 'toggled_state'):
-                msg_dict['toggled_state'] = msg.toggled_state
-            if hasattr(msg, 'capture_type'):
-                msg_dict['capture_type'] = msg.capture_type
-                
-            serializable_msgs.append(msg_dict)
+        capture = self.captures[action_name]
+        
+        # Pack the message arrays into binary records
+        records = np.empty(len(capture['timestamp']), dtype=CAPTURE_RECORD_DTYPE)
+        for field in CAPTURE_RECORD_DTYPE.names:
+            records[field] = capture[field]
+        
+        header = {
+            'version': CAPTURE_FORMAT_VERSION,
+            'count': len(records),
+            'meta': capture['meta'],
+        }
             
         # Create filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.sessions_dir}/{timestamp}_{action_name}.json"
+        filename = f"{self.sessions_dir}/{timestamp}_{action_name}{CAPTURE_EXTENSION}"
         
         # Save to file
-        with open(filename, 'w') as f:
-            json.dump(serializable_msgs, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_json_dumps(header) + b'\n')
+            records.tofile(f)
+            
+        print(f"Saved {len(records)} messages to {filename}")
+
+    def save_capture_parquet(self, action_name):
+        """
+        Save a specific capture to a zstd-compressed Parquet file.
+
+        The message arrays are stored as columns and the capture metadata as
+        JSON in the file's schema metadata. Requires pyarrow.
+
+        Args:
+            action_name: Name of the capture to save
+        """
+        if pa is None:
+            print("Saving Parquet files requires pyarrow (pip install pyarrow)")
+            return
             
-        print(f"Saved {len(serializable_msgs)} messages to {filename}")
+        if action_name not in self.captures:
+            print(f"No capture found with name '{action_name}'")
+            return
+            
+        capture = self.captures[action_name]
+        count = len(capture['timestamp'])
+        
+        table = pa.table({
+            'timestamp': pa.array(capture['timestamp'], type=pa.float64()),
+            'arbitration_id': pa.array(capture['arbitration_id'], type=pa.uint32()),
+            'dlc': pa.array(capture['dlc'], type=pa.uint8()),
+            'flags': pa.array(capture['flags'], type=pa.uint8()),
+            'data': pa.FixedSizeBinaryArray.from_buffers(
+                pa.binary(8), count, [None, pa.py_buffer(np.ascontiguousarray(capture['data']))]
+            ),
+        })
+        header = {'version': CAPTURE_FORMAT_VERSION, 'meta': capture['meta']}
+        table = table.replace_schema_metadata({b'can_capture': _json_dumps(header)})
+        
+        # Create filename with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{self.sessions_dir}/{timestamp}_{action_name}{PARQUET_EXTENSION}"
+        
+        pq.write_table(table, filename, compression='zstd', compression_level=9)
+        print(f"Saved {count} messages to {filename}")
         
     def load_capture(self, filename):
         """
@@ -236,65 +869,170 @@ class CANActionAnalyzer:
         Returns:
             Name of the loaded capture (added to self.captures)
         """
-        with open(filename, 'r') as f:
-            data = json.load(f)
-            
         # Extract action name from filename
         base = os.path.basename(filename)
         action_name = base.split('_', 1)[1].rsplit('.', 1)[0]
         
-        # Convert serialized data back to Message-like objects
-        messages = []
-        for msg_data in data:
-            msg = type('Message', (), {})()
-            msg.timestamp = msg_data['timestamp']
-            msg.arbitration_id = msg_data['arbitration_id']
-            msg.dlc = msg_data['dlc']
-            msg.data = bytes(msg_data['data'])
-            msg.is_extended_id = msg_data['is_extended_id']
-            msg.is_remote_frame = msg_data['is_remote_frame']
-            msg.is_error_frame = msg_data['is_error_frame']
-            
-            # Load action timestamps if they exist
-            if 'action_timestamps' in msg_data:
-                msg.action_timestamps = msg_data['action_timestamps']
-                
-            # Load binary toggle metadata if they exist
-            if 'toggle_events' in msg_data:
-                msg.toggle_events = msg_data['toggle_events']
-            if 'initial_state' in msg_data:
-                msg.initial_state = msg_data['initial_state']
-            if 'toggled_state' in msg_data:
-                msg.toggled_state = msg_data['toggled_state']
-            if 'capture_type' in msg_data:
-                msg.capture_type = msg_data['capture_type']
-                
-            messages.append(msg)
-            
-        self.captures[action_name] = messages
+        if filename.endswith('.json'):
+            capture = self._load_json_capture(filename)
+        elif filename.endswith(PARQUET_EXTENSION):
+            capture = self._load_parquet_capture(filename)
+            if capture is None:
+                return None
+        else:
+            with open(filename, 'rb') as f:
+                header = _json_loads(f.readline())
+                records_offset = f.tell()
+            # Map the records rather than reading them into memory, so only the
+            # per-field arrays take up RAM while a large capture is loaded
+            if header['count']:
+                records = np.memmap(filename, dtype=CAPTURE_RECORD_DTYPE, mode='r',
+                                    offset=records_offset, shape=(header['count'],))
+            else:
+                records = np.empty(0, dtype=CAPTURE_RECORD_DTYPE)
+            capture = {field: np.array(records[field]) for field in CAPTURE_RECORD_DTYPE.names}
+            del records
+            capture['meta'] = header['meta']
+        
+        self.captures[action_name] = capture
+        self.capture_digests.pop(action_name, None)
+        self.id_indexes.pop(action_name, None)
+        count = len(capture['timestamp'])
+        meta = capture['meta']
         
         # Detect what kind of capture this is
         capture_type = "Regular"
         action_count = 1
         
-        if messages:
-            if hasattr(messages[0], 'capture_type') and messages[0].capture_type == 'binary_toggle':
-                capture_type = "Binary Toggle"
-                if hasattr(messages[0], 'toggle_events'):
-                    action_count = len(messages[0].toggle_events)
-            elif hasattr(messages[0], 'action_timestamps'):
-                action_count = len(messages[0].action_timestamps)
-                capture_type = "Multi-Action"
+        if meta.get('capture_type') == 'binary_toggle':
+            capture_type = "Binary Toggle"
+            if 'toggle_events' in meta:
+                action_count = len(meta['toggle_events'])
+        elif 'action_timestamps' in meta:
+            action_count = len(meta['action_timestamps'])
+            capture_type = "Multi-Action"
         
         if capture_type == "Binary Toggle":
-            print(f"Loaded {len(messages)} messages for '{action_name}' - Binary Toggle with {action_count} state changes")
+            print(f"Loaded {count} messages for '{action_name}' - Binary Toggle with {action_count} state changes")
         elif action_count > 1:
-            print(f"Loaded {len(messages)} messages for '{action_name}' with {action_count} action repeats")
+            print(f"Loaded {count} messages for '{action_name}' with {action_count} action repeats")
         else:
-            print(f"Loaded {len(messages)} messages for '{action_name}'")
+            print(f"Loaded {count} messages for '{action_name}'")
             
         return action_name
 
+    def _load_json_capture(self, filename):
+        """
+        Load a capture saved in the older JSON format (a list of message dicts).
+
+        Args:
+            filename: Path to the JSON capture file
+
+        Returns:
+            Capture dictionary of message arrays (see _to_soa)
+        """
+        with open(filename, 'rb') as f:
+            data = _json_loads(f.read())
+            
+        # Skip the metadata placeholder message, if present, by starting after it
+        # rather than copying the rest of the list
+        meta = {}
+        data_start = 0
+        if data and any(key in data[0] for key in META_KEYS):
+            meta = {key: data[0][key] for key in META_KEYS if key in data[0]}
+            data_start = 1
+        
+        # Convert serialized data to message arrays
+        count = len(data) - data_start
+        payloads = bytearray(b''.join(bytes(msg_data['data'][:8]).ljust(8, b'\0') for msg_data in islice(data, data_start, None)))
+        return {
+            'timestamp': np.fromiter((msg_data['timestamp'] for msg_data in islice(data, data_start, None)), dtype=np.float64, count=count),
+            'arbitration_id': np.fromiter((msg_data['arbitration_id'] for msg_data in islice(data, data_start, None)), dtype=np.uint32, count=count),
+            'dlc': np.fromiter((min(msg_data['dlc'], 8) for msg_data in islice(data, data_start, None)), dtype=np.uint8, count=count),
+            'flags': np.fromiter(
+                (
+                    (FLAG_EXTENDED_ID if msg_data['is_extended_id'] else 0)
+                    | (FLAG_REMOTE_FRAME if msg_data['is_remote_frame'] else 0)
+                    | (FLAG_ERROR_FRAME if msg_data['is_error_frame'] else 0)
+                    for msg_data in islice(data, data_start, None)
+                ),
+                dtype=np.uint8,
+                count=count
+            ),
+            'data': np.frombuffer(payloads, dtype=np.uint8).reshape(-1, 8),
+            'meta': meta,
+        }
+
+    def _load_parquet_capture(self, filename):
+        """
+        Load a capture saved by save_capture_parquet.
+
+        Args:
+            filename: Path to the Parquet capture file
+
+        Returns:
+            Capture dictionary of message arrays (see _to_soa), or None if pyarrow
+            is not installed
+        """
+        if pq is None:
+            print("Loading Parquet files requires pyarrow (pip install pyarrow)")
+            return None
+            
+        table = pq.read_table(filename)
+        header = _json_loads(table.schema.metadata[b'can_capture'])
+        capture = {
+            field: table.column(field).to_numpy()
+            for field in ('timestamp', 'arbitration_id', 'dlc', 'flags')
+        }
+        
+        # Fixed-size binary values are stored back to back, so the value buffer
+        # is already the (N, 8) payload array
+        data = table.column('data').combine_chunks()
+        payloads = np.frombuffer(data.buffers()[1], dtype=np.uint8)
+        capture['data'] = payloads[data.offset * 8:(data.offset + len(data)) * 8].reshape(-1, 8)
+        capture['meta'] = header['meta']
+        return capture
+
+    def _capture_digest(self, name):
+        """
+        Get a hash of a capture's contents, computed once per capture.
+
+        Args:
+            name: Name of the capture
+
+        Returns:
+            Digest bytes identifying the capture contents
+        """
+        if name not in self.capture_digests:
+            capture = self.captures[name]
+            digest = hashlib.blake2b(digest_size=16)
+            for field in CAPTURE_RECORD_DTYPE.names:
+                digest.update(np.ascontiguousarray(capture[field]).tobytes())
+            digest.update(_json_dumps(capture['meta']))
+            self.capture_digests[name] = digest.digest()
+        return self.capture_digests[name]
+
+    def _id_index(self, name):
+        """
+        Get the rows of each message ID in a capture, computed once per capture.
+
+        The rows of ID ids[k] are order[starts[k]:starts[k] + counts[k]], in
+        capture order.
+
+        Args:
+            name: Name of the capture
+
+        Returns:
+            Tuple of (sorted array of message IDs, row indices sorted by ID,
+            start of each ID's rows in that order, message count of each ID)
+        """
+        if name not in self.id_indexes:
+            arbitration_ids = self.captures[name]['arbitration_id']
+            order = np.argsort(arbitration_ids, kind='stable')
+            ids, starts, counts = np.unique(arbitration_ids[order], return_index=True, return_counts=True)
+            self.id_indexes[name] = (ids, order, starts, counts)
+        return self.id_indexes[name]
+
     def compare_captures(self, action_name, baseline_name="baseline"):
         """
         Compare an action capture with a baseline to identify differences.
@@ -314,86 +1052,29 @@ class CANActionAnalyzer:
             print(f"Baseline capture '{baseline_name}' not found")
             return None
             
-        action_messages = self.captures[action_name].copy()
-        baseline_messages = self.captures[baseline_name]
-        
-        # Check if this is a multi-action capture by looking for metadata
-        action_timestamps = []
-        if action_messages and hasattr(action_messages[0], 'action_timestamps'):
-            action_timestamps = action_messages[0].action_timestamps
-            # Remove the metadata message from analysis
-            action_messages = action_messages[1:]
-        
-        # Group messages by ID
-        action_by_id = defaultdict(list)
-        baseline_by_id = defaultdict(list)
-        
-        for msg in action_messages:
-            action_by_id[msg.arbitration_id].append(msg)
-            
-        for msg in baseline_messages:
-            baseline_by_id[msg.arbitration_id].append(msg)
+        # Reuse the result if these captures were already compared
+        cache_key = (action_name, self._capture_digest(action_name), self._capture_digest(baseline_name))
+        if cache_key in self.compare_cache:
+            self.compare_cache.move_to_end(cache_key)
+            return self.compare_cache[cache_key]
             
+        action = self.captures[action_name]
+        baseline = self.captures[baseline_name]
+        
+        # Multi-action captures carry the action timestamps in their metadata
+        action_timestamps = action['meta'].get('action_timestamps', [])
+        
+        # Capture durations and action times are the same for every ID
+        base_duration = baseline['timestamp'][-1] if len(baseline['timestamp']) else 1
+        action_duration = action['timestamp'][-1] if len(action['timestamp']) else 1
+        action_times = np.asarray(action_timestamps, dtype=np.float64) if len(action_timestamps) > 1 else None
+        
         # Analyze differences
-        differences = {}
-        all_ids = set(action_by_id.keys()) | set(baseline_by_id.keys())
+        differences = _compare_id_groups(action, baseline, action_name, base_duration, action_duration, action_times)
         
-        for msg_id in all_ids:
-            base_count = len(baseline_by_id[msg_id])
-            action_count = len(action_by_id[msg_id])
-            
-            # Calculate message frequency (messages per second)
-            base_freq = base_count / (baseline_messages[-1].timestamp if baseline_messages else 1)
-            action_freq = action_count / (action_messages[-1].timestamp if action_messages else 1)
-            
-            # Check for frequency changes
-            freq_change = action_freq - base_freq
-            freq_change_pct = (freq_change / base_freq * 100) if base_freq > 0 else float('inf')
-            
-            # Identify new or different messages
-            is_new = base_count == 0 and action_count > 0
-            has_freq_change = abs(freq_change_pct) > 20  # 20% threshold
-            
-            # Check for data pattern changes
-            data_changed = False
-            # Convert bytearray to immutable bytes object before adding to set
-            unique_payloads_base = set(bytes(msg.data) for msg in baseline_by_id[msg_id])
-            unique_payloads_action = set(bytes(msg.data) for msg in action_by_id[msg_id])
-            new_payloads = unique_payloads_action - unique_payloads_base
-            
-            # Check for correlation with action timestamps if multi-action capture
-            action_correlated = False
-            if action_timestamps and len(action_timestamps) > 1 and msg_id in action_by_id:
-                # Get message timestamps
-                msg_timestamps = [msg.timestamp for msg in action_by_id[msg_id]]
-                
-                # Check if messages occur close to action timestamps
-                correlation_count = 0
-                window = 1.0  # 1 second window around each action
-                
-                for action_time in action_timestamps:
-                    for msg_time in msg_timestamps:
-                        if abs(msg_time - action_time) < window:
-                            correlation_count += 1
-                            break
-                
-                # Consider correlated if messages appear near most action timestamps
-                if correlation_count >= len(action_timestamps) * 0.5:  # At least 50% of actions
-                    action_correlated = True
-            
-            if is_new or has_freq_change or new_payloads:
-                differences[msg_id] = {
-                    'msg_id': hex(msg_id),
-                    'is_new': is_new,
-                    'base_count': base_count,
-                    'action_count': action_count,
-                    'freq_change_pct': freq_change_pct,
-                    'new_payloads': [list(payload) for payload in new_payloads],
-                    'baseline_payloads': [list(payload) for payload in unique_payloads_base],
-                    'action_payloads': [list(payload) for payload in unique_payloads_action],
-                    'action_name': action_name,
-                    'action_correlated': action_correlated,
-                }
+        self.compare_cache[cache_key] = differences
+        if len(self.compare_cache) > COMPARE_CACHE_SIZE:
+            self.compare_cache.popitem(last=False)
                 
         return differences
 
@@ -440,7 +1121,7 @@ class CANActionAnalyzer:
             if diff['new_payloads']:
                 print(f"   ✓ NEW DATA PATTERNS: {len(diff['new_payloads'])} new patterns")
                 for j, payload in enumerate(diff['new_payloads'][:3], 1):  # Show first 3
-                    hex_payload = ' '.join([f"{b:02X}" for b in payload])
+                    hex_payload = payload.hex(' ').upper()
                     print(f"     {j}. {hex_payload}")
                 if len(diff['new_payloads']) > 3:
                     print(f"     ... and {len(diff['new_payloads'])-3} more patterns")
@@ -469,6 +1150,22 @@ class CANActionAnalyzer:
             
         return min(score, 100)  # Cap at 100%
 
+    def _most_frequent_ids(self, name, count):
+        """
+        Find the message IDs that occur most often in a capture.
+
+        Args:
+            name: Name of the capture
+            count: Number of IDs to return
+
+        Returns:
+            List of up to count message IDs, most frequent first; ties are kept in
+            order of first appearance in the capture
+        """
+        ids, order, starts, counts = self._id_index(name)
+        most_frequent = np.lexsort((order[starts], -counts))[:count]
+        return ids[most_frequent].tolist()
+
     def plot_message_timeline(self, action_name, msg_ids=None):
         """
         Plot a timeline of when specific messages occurred.
@@ -481,14 +1178,10 @@ class CANActionAnalyzer:
             print(f"Capture '{action_name}' not found")
             return
             
-        messages = self.captures[action_name]
+        capture = self.captures[action_name]
         
-        # Check if this is a multi-action capture by looking for metadata
-        action_timestamps = []
-        if messages and hasattr(messages[0], 'action_timestamps'):
-            action_timestamps = messages[0].action_timestamps
-            # Remove the metadata message from analysis
-            messages = messages[1:]
+        # Multi-action captures carry the action timestamps in their metadata
+        action_timestamps = capture['meta'].get('action_timestamps', [])
         
         if not msg_ids:
             # If no message IDs specified, use the ones that changed most
@@ -496,24 +1189,18 @@ class CANActionAnalyzer:
                 diffs = self.compare_captures(action_name)
                 if diffs:
                     # Take the top 5 with highest confidence
-                    sorted_diffs = sorted(
+                    top_diffs = heapq.nlargest(
+                        5,
                         diffs.items(),
-                        key=lambda x: self._calculate_confidence(x[1]),
-                        reverse=True
+                        key=lambda x: self._calculate_confidence(x[1])
                     )
-                    msg_ids = [msg_id for msg_id, _ in sorted_diffs[:5]]
+                    msg_ids = [msg_id for msg_id, _ in top_diffs]
                 else:
                     # If no differences, take the most frequent 5 messages
-                    counter = defaultdict(int)
-                    for msg in messages:
-                        counter[msg.arbitration_id] += 1
-                    msg_ids = [msg_id for msg_id, _ in sorted(counter.items(), key=lambda x: x[1], reverse=True)[:5]]
+                    msg_ids = self._most_frequent_ids(action_name, 5)
             else:
                 # If no baseline, take the most frequent 5 messages
-                counter = defaultdict(int)
-                for msg in messages:
-                    counter[msg.arbitration_id] += 1
-                msg_ids = [msg_id for msg_id, _ in sorted(counter.items(), key=lambda x: x[1], reverse=True)[:5]]
+                msg_ids = self._most_frequent_ids(action_name, 5)
         
         # Create plot
         plt.figure(figsize=(12, 6))
@@ -521,22 +1208,27 @@ class CANActionAnalyzer:
         # Each message ID gets its own y-position
         y_positions = {msg_id: i+1 for i, msg_id in enumerate(msg_ids)}
         
-        # Plot each message as a point on the timeline
-        for msg in messages:
-            if msg.arbitration_id in y_positions:
-                plt.plot(
-                    msg.timestamp, 
-                    y_positions[msg.arbitration_id], 
-                    'o', 
-                    markersize=4,
-                    alpha=0.7
-                )
-        
-        # Add vertical lines for action timestamps
+        # Plot all messages of the selected IDs as points on the timeline in one call,
+        # taking each ID's rows from the capture's ID index
+        ids, order, starts, counts = self._id_index(action_name)
+        positions = np.searchsorted(ids, list(y_positions.keys()))
+        selected = []
+        y_values = []
+        for k, (msg_id, y) in zip(positions.tolist(), y_positions.items()):
+            if k < len(ids) and ids[k] == msg_id:
+                selected.append(order[starts[k]:starts[k] + counts[k]])
+                y_values.append(np.full(counts[k], y))
+        plt.scatter(
+            capture['timestamp'][np.concatenate(selected)] if selected else [],
+            np.concatenate(y_values) if y_values else [],
+            s=16,
+            alpha=0.7
+        )
+        
+        # Add vertical lines for action timestamps as a single line collection
         if action_timestamps:
-            for i, timestamp in enumerate(action_timestamps):
-                plt.axvline(x=timestamp, color='r', linestyle='--', alpha=0.7, 
-                            label=f"Action {i+1}" if i == 0 else "")
+            plt.vlines(action_timestamps, 0.5, len(y_positions) + 0.5, colors='r', linestyles='--', alpha=0.7,
+                       label="Actions")
             
             # Add a legend for the action lines
             plt.legend(loc='upper right')
@@ -575,11 +1267,11 @@ class CANActionAnalyzer:
             state_duration: Duration to hold each state in seconds (default: 3)
 
         Returns:
-            List of captured CAN messages with toggle metadata
+            Capture dictionary of message arrays with toggle metadata (see _to_soa)
         """
         if not self.bus:
             if not self.connect():
-                return []
+                return _to_soa([])
 
         print(f"\n{'='*60}")
         print(f"BINARY TOGGLE CAPTURE: {action_name}")
@@ -600,13 +1292,18 @@ class CANActionAnalyzer:
         input(f"\nEnsure the {action_name} is in the '{initial_state}' state, then press Enter to begin...")
         
         # Countdown
-        for i in range(3, 0, -1):
-            print(f"Starting capture in {i}...")
-            time.sleep(1)
+        self._countdown()
         
-        messages = []
+        buffer = _CaptureBuffer(max(4096, int(toggle_count * 2 * state_duration * EXPECTED_MESSAGE_RATE)))
         toggle_events = []  # Store when each toggle occurred and what state
+        
+        # The start time is taken before receiving starts so no received frame comes before it
         start_time = time.time()
+        start_ns = time.monotonic_ns()
+        
+        # Receive in a background thread so the kernel buffer keeps being drained
+        # while this loop handles prompts
+        receive = self._start_reader()
         current_state = initial_state
         
         print(f"\nCapture started! Current state: '{current_state}'")
@@ -614,18 +1311,14 @@ class CANActionAnalyzer:
         try:
             for toggle_num in range(toggle_count * 2):  # Each toggle involves 2 state changes
                 # Capture messages for the current state duration
-                state_start_time = time.time()
-                state_end_time = state_start_time + state_duration
+                state_end_ns = time.monotonic_ns() + int(state_duration * 1e9)
                 
-                while time.time() < state_end_time:
-                    msg = self.bus.recv(timeout=self.sample_rate)
-                    if msg:
-                        msg.timestamp = time.time() - start_time
-                        messages.append(msg)
+                while time.monotonic_ns() < state_end_ns:
+                    receive(buffer)
                 
                 # Prompt for state change (except after the last state)
                 if toggle_num < (toggle_count * 2) - 1:
-                    current_time = time.time() - start_time
+                    current_time = (time.monotonic_ns() - start_ns) * 1e-9
                     
                     # Determine next state
                     if current_state == initial_state:
@@ -648,33 +1341,34 @@ class CANActionAnalyzer:
                     time.sleep(0.5)
                 else:
                     # Final state - just record the end
-                    current_time = time.time() - start_time
+                    current_time = (time.monotonic_ns() - start_ns) * 1e-9
                     print(f"\nCapture complete! Final state: '{current_state}'")
                     
         except KeyboardInterrupt:
             print("\nCapture interrupted by user.")
+        finally:
+            for msg in self._stop_reader():
+                buffer.append(msg)
+        
+        # Receive timestamps from the bus are made relative to the start of the capture
+        capture = buffer.to_capture(start_time)
         
-        print(f"\nCapture complete! Collected {len(messages)} messages across {len(toggle_events)} state changes.")
-        
-        # Add toggle metadata to the first message for later analysis
-        if messages and toggle_events:
-            meta_msg = type('Message', (), {})()
-            meta_msg.timestamp = 0
-            meta_msg.arbitration_id = 0
-            meta_msg.dlc = 8
-            meta_msg.data = bytes([0, 0, 0, 0, 0, 0, 0, 0])
-            meta_msg.is_extended_id = False
-            meta_msg.is_remote_frame = False
-            meta_msg.is_error_frame = False
-            meta_msg.toggle_events = toggle_events
-            meta_msg.initial_state = initial_state
-            meta_msg.toggled_state = toggled_state
-            meta_msg.capture_type = 'binary_toggle'
-            messages.insert(0, meta_msg)
+        print(f"\nCapture complete! Collected {len(capture['timestamp'])} messages across {len(toggle_events)} state changes.")
+        
+        # Add toggle metadata to the capture for later analysis
+        if len(capture['timestamp']) and toggle_events:
+            capture['meta'].update({
+                'toggle_events': toggle_events,
+                'initial_state': initial_state,
+                'toggled_state': toggled_state,
+                'capture_type': 'binary_toggle',
+            })
         
         # Store the capture
-        self.captures[action_name] = messages
-        return messages
+        self.captures[action_name] = capture
+        self.capture_digests.pop(action_name, None)
+        self.id_indexes.pop(action_name, None)
+        return capture
 
     def analyze_binary_toggles(self, action_name):
         """
@@ -690,19 +1384,16 @@ class CANActionAnalyzer:
             print(f"Toggle capture '{action_name}' not found")
             return None
             
-        messages = self.captures[action_name].copy()
+        capture = self.captures[action_name]
         
         # Extract toggle metadata
-        if not messages or not hasattr(messages[0], 'toggle_events'):
+        if 'toggle_events' not in capture['meta']:
             print(f"Capture '{action_name}' doesn't appear to be a binary toggle capture")
             return None
             
-        toggle_events = messages[0].toggle_events
-        initial_state = messages[0].initial_state
-        toggled_state = messages[0].toggled_state
-        
-        # Remove metadata message
-        messages = messages[1:]
+        toggle_events = capture['meta']['toggle_events']
+        initial_state = capture['meta']['initial_state']
+        toggled_state = capture['meta']['toggled_state']
         
         print(f"\nAnalyzing binary toggle capture: {action_name}")
         print(f"States: '{initial_state}' ↔ '{toggled_state}'")
@@ -711,81 +1402,87 @@ class CANActionAnalyzer:
         # Group messages by ID and analyze payload patterns around toggle events
         toggle_analysis = {}
         
-        # Group messages by arbitration ID
-        messages_by_id = defaultdict(list)
-        for msg in messages:
-            messages_by_id[msg.arbitration_id].append(msg)
+        # Toggle times and windows are the same for every message ID
+        toggle_window = 2.0  # 2-second window around each toggle
+        toggle_times = np.array([event['timestamp'] for event in toggle_events], dtype=np.float64)
+        window_starts = toggle_times - toggle_window
+        
+        # Take (timestamp, payload, dlc) of each arbitration ID from the capture's ID
+        # index, IDs in order of first appearance; payloads are compared as packed
+        # 8-byte integers and only turned into bytes where they change
+        ids, order, starts, counts = self._id_index(action_name)
+        packed_payloads = capture['data'].view('<u8').reshape(-1)
         
         # Analyze each message ID
-        for msg_id, msg_list in messages_by_id.items():
-            # Create timeline of payloads for this message ID
-            payload_timeline = []
-            for msg in msg_list:
-                payload_timeline.append({
-                    'timestamp': msg.timestamp,
-                    'payload': bytes(msg.data)
-                })
+        for k in np.argsort(order[starts]).tolist():
+            msg_id = int(ids[k])
+            rows = order[starts[k]:starts[k] + counts[k]]
             
-            # Sort by timestamp
-            payload_timeline.sort(key=lambda x: x['timestamp'])
+            # Create timeline of payloads for this message ID; rows in capture order are
+            # already in time order, so only sort if a timestamp goes backwards
+            timestamps = capture['timestamp'][rows]
+            if (timestamps[1:] < timestamps[:-1]).any():
+                rows = rows[np.argsort(timestamps, kind='stable')]
+            payload_timeline = packed_payloads[rows]
+            dlc_timeline = capture['dlc'][rows]
             
             # Analyze payload changes around toggle events
-            toggle_correlations = []
-            unique_payloads = set()
-            payload_changes = []
+            # Track payload changes (in content or length) as the rows before and after
+            # each one; a message whose payload never changes cannot correlate with the toggles
+            change_positions = np.flatnonzero(
+                (payload_timeline[1:] != payload_timeline[:-1]) | (dlc_timeline[1:] != dlc_timeline[:-1])
+            )
+            if not len(change_positions):
+                continue
+            previous = rows[change_positions]
+            changed = rows[change_positions + 1]
             
-            # Track payload changes
-            for i in range(1, len(payload_timeline)):
-                prev_payload = payload_timeline[i-1]['payload']
-                curr_payload = payload_timeline[i]['payload']
-                
-                if prev_payload != curr_payload:
-                    payload_changes.append({
-                        'timestamp': payload_timeline[i]['timestamp'],
-                        'from_payload': prev_payload,
-                        'to_payload': curr_payload
-                    })
-                    unique_payloads.add(prev_payload)
-                    unique_payloads.add(curr_payload)
+            # Distinct payloads involved in those changes, found as distinct
+            # (packed payload, DLC) pairs and only then turned into bytes
+            unique_payloads = _payload_bytes(_unique_payloads(capture, np.concatenate([previous, changed])))
             
-            # Check correlation with toggle events
-            correlated_changes = 0
-            toggle_window = 2.0  # 2-second window around each toggle
+            # Check correlation with toggle events. Payload changes are in time order, so
+            # the first change within the window of each toggle is the first one at or
+            # after the start of the window
+            change_times = capture['timestamp'][changed]
+            first_changes = np.searchsorted(change_times, window_starts)
+            nearest_changes = change_times[np.minimum(first_changes, len(change_times) - 1)]
+            matched = (first_changes < len(change_times)) & (np.abs(nearest_changes - toggle_times) <= toggle_window)
+            correlated_changes = int(np.count_nonzero(matched))
             
-            for toggle_event in toggle_events:
-                toggle_time = toggle_event['timestamp']
-                
-                # Look for payload changes near this toggle
-                for change in payload_changes:
-                    if abs(change['timestamp'] - toggle_time) <= toggle_window:
-                        correlated_changes += 1
-                        toggle_correlations.append({
-                            'toggle_event': toggle_event,
-                            'payload_change': change,
-                            'time_diff': change['timestamp'] - toggle_time
-                        })
-                        break
+            # Only the first correlated change is needed (to map payloads to states),
+            # so only its payloads are turned into bytes
+            first_correlation = None
+            if correlated_changes:
+                toggle_index = int(np.argmax(matched))
+                change_index = first_changes[toggle_index]
+                prev_row = previous[change_index]
+                curr_row = changed[change_index]
+                first_correlation = {
+                    'toggle_event': toggle_events[toggle_index],
+                    'payload_change': {
+                        'timestamp': float(change_times[change_index]),
+                        'from_payload': capture['data'][prev_row, :capture['dlc'][prev_row]].tobytes(),
+                        'to_payload': capture['data'][curr_row, :capture['dlc'][curr_row]].tobytes()
+                    },
+                    'time_diff': float(change_times[change_index] - toggle_times[toggle_index])
+                }
             
             # Calculate binary toggle characteristics
             is_binary_toggle = False
             binary_confidence = 0
             state_payloads = {}
+            correlation_ratio = correlated_changes / len(toggle_events) if toggle_events else 0
             
             # Check if this message has exactly 2 unique payloads
             if len(unique_payloads) == 2:
                 # Check if payload changes correlate well with state toggles
-                correlation_ratio = correlated_changes / len(toggle_events) if toggle_events else 0
-                
                 if correlation_ratio >= 0.6:  # At least 60% of toggles have corresponding payload changes
                     is_binary_toggle = True
                     binary_confidence = min(correlation_ratio * 100, 100)
                     
-                    # Try to map payloads to states
-                    payloads = list(unique_payloads)
-                    
-                    # Use the first correlated change to determine mapping
-                    if toggle_correlations:
-                        first_correlation = toggle_correlations[0]
+                    # Use the first correlated change to map payloads to states
+                    if first_correlation:
                         if first_correlation['toggle_event']['from_state'] == initial_state:
                             # Transition from initial to toggled state
                             state_payloads[initial_state] = first_correlation['payload_change']['from_payload']
@@ -801,13 +1498,14 @@ class CANActionAnalyzer:
                     'msg_id': hex(msg_id),
                     'is_binary_toggle': is_binary_toggle,
                     'binary_confidence': binary_confidence,
-                    'unique_payloads': list(unique_payloads),
-                    'payload_changes_count': len(payload_changes),
+                    'unique_payloads': unique_payloads,
+                    'payload_changes_count': len(change_times),
                     'correlated_changes': correlated_changes,
-                    'correlation_ratio': correlated_changes / len(toggle_events) if toggle_events else 0,
-                    'toggle_correlations': toggle_correlations,
+                    'correlation_ratio': correlation_ratio,
+                    'toggle_count': len(toggle_events),
+                    'first_correlation': first_correlation,
                     'state_payloads': state_payloads,
-                    'message_count': len(msg_list)
+                    'message_count': len(rows)
                 }
         
         return toggle_analysis
@@ -827,15 +1525,18 @@ class CANActionAnalyzer:
         print(f"BINARY TOGGLE ANALYSIS RESULTS")
         print(f"{'=' * 80}")
         
-        # Sort by binary confidence
+        # Sort by binary confidence, reading the sort fields out of each result once,
+        # then split into binary toggles and other correlations in a single pass
         sorted_analysis = sorted(
-            analysis.items(),
-            key=lambda x: (x[1]['is_binary_toggle'], x[1]['binary_confidence']),
+            ((data['is_binary_toggle'], data['binary_confidence'], msg_id, data) for msg_id, data in analysis.items()),
+            key=itemgetter(0, 1),
             reverse=True
         )
         
-        binary_toggles = [item for item in sorted_analysis if item[1]['is_binary_toggle']]
-        other_correlations = [item for item in sorted_analysis if not item[1]['is_binary_toggle']]
+        binary_toggles = []
+        other_correlations = []
+        for is_binary_toggle, _, msg_id, data in sorted_analysis:
+            (binary_toggles if is_binary_toggle else other_correlations).append((msg_id, data))
         
         if binary_toggles:
             print(f"\n🎯 CONFIRMED BINARY TOGGLE MESSAGES ({len(binary_toggles)} found):")
@@ -844,17 +1545,17 @@ class CANActionAnalyzer:
             for i, (msg_id, data) in enumerate(binary_toggles, 1):
                 print(f"\n{i}. Message ID: {data['msg_id']} - Confidence: {data['binary_confidence']:.1f}%")
                 print(f"   ✓ BINARY TOGGLE DETECTED: Changes between exactly 2 payloads")
-                print(f"   ✓ Correlation: {data['correlated_changes']}/{len(data['toggle_correlations'])} toggles matched")
+                print(f"   ✓ Correlation: {data['correlated_changes']}/{data['toggle_count']} toggles matched")
                 
                 if data['state_payloads']:
                     print(f"   ✓ STATE MAPPING:")
                     for state, payload in data['state_payloads'].items():
-                        hex_payload = ' '.join([f"{b:02X}" for b in payload])
+                        hex_payload = payload.hex(' ').upper()
                         print(f"     '{state}': {hex_payload}")
                 else:
                     print(f"   ✓ PAYLOADS:")
                     for j, payload in enumerate(data['unique_payloads'], 1):
-                        hex_payload = ' '.join([f"{b:02X}" for b in payload])
+                        hex_payload = payload.hex(' ').upper()
                         print(f"     Payload {j}: {hex_payload}")
         
         if other_correlations:
@@ -868,9 +1569,29 @@ class CANActionAnalyzer:
                 
                 if len(data['unique_payloads']) <= 3:  # Show payloads if not too many
                     for j, payload in enumerate(data['unique_payloads'], 1):
-                        hex_payload = ' '.join([f"{b:02X}" for b in payload])
+                        hex_payload = payload.hex(' ').upper()
                         print(f"     Payload {j}: {hex_payload}")
 
+def _saved_capture_files(sessions_dir):
+    """
+    List the capture files saved in a sessions directory.
+
+    Args:
+        sessions_dir: Directory captures are saved to
+
+    Returns:
+        List of capture file names; empty if the directory does not exist
+    """
+    try:
+        with os.scandir(sessions_dir) as entries:
+            return [
+                entry.name for entry in entries
+                if entry.name.endswith((CAPTURE_EXTENSION, PARQUET_EXTENSION, '.json')) and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
+
 def interactive_session(analyzer):
     """Run an interactive CAN bus analysis session."""
     
@@ -883,15 +1604,7 @@ def interactive_session(analyzer):
 
     # Menu system
     while True:
-        print("\nMAIN MENU:")
-        print("1. Establish baseline (capture normal traffic)")
-        print("2. Capture traffic during specific action")
-        print("3. Analyze differences between captures")
-        print("4. Save/load captures")
-        print("5. Visualize message timeline")
-        print("6. Capture binary toggle action")
-        print("7. Analyze binary toggle capture")
-        print("0. Exit")
+        print(MAIN_MENU)
         
         choice = input("\nEnter your choice (0-7): ")
         
@@ -945,7 +1658,7 @@ def interactive_session(analyzer):
                 
             print("\nAvailable captures:")
             for i, name in enumerate(analyzer.captures.keys(), 1):
-                print(f"{i}. {name} ({len(analyzer.captures[name])} messages)")
+                print(f"{i}. {name} ({len(analyzer.captures[name]['timestamp'])} messages)")
                 
             action_name = input("\nEnter the name of the action capture to analyze: ")
             baseline_name = input("Enter the name of the baseline capture [baseline]: ") or "baseline"
@@ -965,50 +1678,37 @@ def interactive_session(analyzer):
                 
         elif choice == '4':
             # Save/load submenu
-            print("\nSAVE/LOAD MENU:")
-            print("1. List available saved captures")
-            print("2. Load a capture from file")
-            print("3. Return to main menu")
+            print(SAVE_LOAD_MENU)
             
             subchoice = input("\nEnter your choice (1-3): ")
             
             if subchoice == '1':
-                if not os.path.exists(analyzer.sessions_dir):
-                    print("No saved captures found.")
-                    continue
-                    
-                files = os.listdir(analyzer.sessions_dir)
-                json_files = [f for f in files if f.endswith('.json')]
+                capture_files = _saved_capture_files(analyzer.sessions_dir)
                 
-                if not json_files:
+                if not capture_files:
                     print("No saved captures found.")
                     continue
                     
                 print("\nSaved captures:")
-                for i, filename in enumerate(json_files, 1):
+                for i, filename in enumerate(capture_files, 1):
                     print(f"{i}. {filename}")
                     
             elif subchoice == '2':
-                if not os.path.exists(analyzer.sessions_dir):
-                    print("No saved captures found.")
-                    continue
-                    
-                files = os.listdir(analyzer.sessions_dir)
-                json_files = [f for f in files if f.endswith('.json')]
+                capture_files = _saved_capture_files(analyzer.sessions_dir)
                 
-                if not json_files:
+                if not capture_files:
                     print("No saved captures found.")
                     continue
                     
                 print("\nAvailable captures to load:")
-                for i, filename in enumerate(json_files, 1):
+                for i, filename in enumerate(capture_files, 1):
                     print(f"{i}. {filename}")
                     
                 file_idx = input("\nEnter the number of the file to load: ")
                 try:
                     idx = int(file_idx) - 1
-                    if 0 <= idx < len(json_files):
-                        full_path = os.path.join(analyzer.sessions_dir, json_files[idx])
+                    if 0 <= idx < len(capture_files):
+                        full_path = os.path.join(analyzer.sessions_dir, capture_files[idx])
                         analyzer.load_capture(full_path)
                     else:
                         print("Invalid selection.")
@@ -1023,7 +1723,7 @@ def interactive_session(analyzer):
                 
             print("\nAvailable captures:")
             for i, name in enumerate(analyzer.captures.keys(), 1):
-                print(f"{i}. {name} ({len(analyzer.captures[name])} messages)")
+                print(f"{i}. {name} ({len(analyzer.captures[name]['timestamp'])} messages)")
                 
             action_name = input("\nEnter the name of the capture to visualize: ")
             
@@ -1074,10 +1774,9 @@ def interactive_session(analyzer):
                 
             print("\nAvailable captures:")
             for i, name in enumerate(analyzer.captures.keys(), 1):
-                capture_type = "Binary Toggle" if (analyzer.captures[name] and 
-                                                 hasattr(analyzer.captures[name][0], 'capture_type') and 
-                                                 analyzer.captures[name][0].capture_type == 'binary_toggle') else "Regular"
-                print(f"{i}. {name} ({len(analyzer.captures[name])} messages) - {capture_type}")
+                capture = analyzer.captures[name]
+                capture_type = "Binary Toggle" if capture['meta'].get('capture_type') == 'binary_toggle' else "Regular"
+                print(f"{i}. {name} ({len(capture['timestamp'])} messages) - {capture_type}")
                 
             action_name = input("\nEnter the name of the binary toggle capture to analyze: ")
             
@@ -1117,6 +1816,16 @@ def main():
         'can_interface',
         help="CAN interface to use (e.g., can0, slcan0)"
     )
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help="Save captures as zstd-compressed Parquet files (requires pyarrow)"
+    )
+    parser.add_argument(
+        '--raw-socket',
+        action='store_true',
+        help="Capture from a raw SocketCAN socket, bypassing python-can message objects"
+    )
     
     args = parser.parse_args()
     
@@ -1127,7 +1836,11 @@ def main():
     print("=" * 80 + "\n")
     
     # Create analyzer instance
-    analyzer = CANActionAnalyzer(can_interface=args.can_interface)
+    analyzer = CANActionAnalyzer(
+        can_interface=args.can_interface,
+        use_parquet=args.parquet,
+        use_raw_socket=args.raw_socket
+    )
     
     # Connect to CAN bus
     if not analyzer.connect():
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the CAN Action Analyzer's capture comparison and toggle analysis.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from can_action_analyzer import CANActionAnalyzer, _compare_id_groups
+
+
+def make_capture(frames, meta=None):
+    """
+    Build a capture from (timestamp, arbitration_id, payload bytes) tuples.
+    """
+    capture = {
+        'timestamp': np.array([frame[0] for frame in frames], dtype=np.float64),
+        'arbitration_id': np.array([frame[1] for frame in frames], dtype=np.uint32),
+        'dlc': np.array([len(frame[2]) for frame in frames], dtype=np.uint8),
+        'flags': np.zeros(len(frames), dtype=np.uint8),
+        'data': np.zeros((len(frames), 8), dtype=np.uint8),
+        'meta': meta if meta is not None else {},
+    }
+    for i, frame in enumerate(frames):
+        capture['data'][i, :len(frame[2])] = list(frame[2])
+    return capture
+
+
+def compare(action, baseline):
+    """Run the serial comparison the way compare_captures does."""
+    return _compare_id_groups(
+        action, baseline, 'action',
+        baseline['timestamp'][-1], action['timestamp'][-1], None
+    )
+
+
+def test_compare_shorter_payload_is_new():
+    """A payload that only differs in length from the baseline is still new."""
+    baseline = make_capture([(i * 0.1, 0x100, bytes(8)) for i in range(10)])
+    action = make_capture(
+        [(i * 0.1, 0x100, bytes(8)) for i in range(9)] + [(0.9, 0x100, bytes(2))]
+    )
+    differences = compare(action, baseline)
+    assert differences[0x100]['new_payloads'] == [bytes(2)]
+    assert differences[0x100]['baseline_payloads'] == [bytes(8)]
+    assert sorted(differences[0x100]['action_payloads']) == [bytes(2), bytes(8)]
+
+
+def test_compare_reports_payloads_with_their_own_length():
+    """Payloads that only differ in length are reported separately, each trimmed to its DLC."""
+    baseline = make_capture([(i * 0.1, 0x200, b'\x01') for i in range(10)])
+    action = make_capture(
+        [(i * 0.2, 0x200, b'\x01\x00') for i in range(5)] + [(1.0 + i * 0.2, 0x200, b'\x01') for i in range(5)]
+    )
+    differences = compare(action, baseline)
+    assert differences[0x200]['new_payloads'] == [b'\x01\x00']
+    assert sorted(differences[0x200]['action_payloads']) == [b'\x01', b'\x01\x00']
+
+
+def test_compare_identical_captures():
+    """Identical captures have no differences."""
+    frames = [(i * 0.1, 0x300 + i % 3, bytes([i % 2])) for i in range(30)]
+    assert compare(make_capture(frames), make_capture(frames)) == {}
+
+
+def make_toggle_capture(payloads, toggle_times, duration=10.0):
+    """
+    Build a toggle capture for ID 0x300 whose payload switches at each toggle time.
+
+    Args:
+        payloads: The two payloads, for the initial and toggled states
+        toggle_times: Times at which the state toggles
+        duration: Length of the capture in seconds
+    """
+    frames = []
+    for i in range(int(duration * 10)):
+        timestamp = i * 0.1
+        state = sum(1 for toggle_time in toggle_times if toggle_time <= timestamp) % 2
+        frames.append((timestamp, 0x300, payloads[state]))
+        frames.append((timestamp + 0.05, 0x301, bytes([i % 256])))
+    events = [
+        {
+            'timestamp': toggle_time,
+            'from_state': ('off', 'on')[n % 2],
+            'to_state': ('on', 'off')[n % 2],
+        }
+        for n, toggle_time in enumerate(toggle_times)
+    ]
+    return make_capture(frames, {
+        'toggle_events': events,
+        'initial_state': 'off',
+        'toggled_state': 'on',
+        'capture_type': 'binary_toggle',
+    })
+
+
+def analyze_toggles(tmp_path, monkeypatch, capture):
+    """Run analyze_binary_toggles on a capture."""
+    monkeypatch.chdir(tmp_path)
+    analyzer = CANActionAnalyzer("test")
+    analyzer.captures['toggle'] = capture
+    return analyzer.analyze_binary_toggles('toggle')
+
+
+def test_toggle_detected(tmp_path, monkeypatch):
+    capture = make_toggle_capture([b'\x00\x10', b'\x01\x10'], [2.0, 4.0, 6.0, 8.0])
+    analysis = analyze_toggles(tmp_path, monkeypatch, capture)
+    result = analysis[0x300]
+    assert result['is_binary_toggle']
+    assert result['correlated_changes'] == 4
+    assert result['toggle_count'] == 4
+    assert result['state_payloads'] == {'off': b'\x00\x10', 'on': b'\x01\x10'}
+
+
+def test_toggle_payload_length_change(tmp_path, monkeypatch):
+    """A payload that only changes length between states is still a change."""
+    capture = make_toggle_capture([b'\x01', b'\x01\x00'], [2.0, 4.0, 6.0, 8.0])
+    analysis = analyze_toggles(tmp_path, monkeypatch, capture)
+    result = analysis[0x300]
+    assert result['is_binary_toggle']
+    assert result['payload_changes_count'] == 4
+    assert sorted(result['unique_payloads']) == [b'\x01', b'\x01\x00']
+    assert result['state_payloads'] == {'off': b'\x01', 'on': b'\x01\x00'}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for saving and loading CAN Action Analyzer capture files.
+These check that .can, Parquet and legacy JSON captures round-trip exactly.
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import pytest
+
+import can_action_analyzer
+from can_action_analyzer import (
+    CANActionAnalyzer, CAPTURE_RECORD_DTYPE, FLAG_EXTENDED_ID, FLAG_REMOTE_FRAME, FLAG_ERROR_FRAME
+)
+
+
+def make_capture(meta=None):
+    """Build a small capture with standard, extended, RTR and short frames."""
+    capture = {
+        'timestamp': np.array([0.0, 0.25, 0.5, 1.125], dtype=np.float64),
+        'arbitration_id': np.array([0x123, 0x18DAF110, 0x3C3, 0x7FF], dtype=np.uint32),
+        'dlc': np.array([8, 3, 0, 2], dtype=np.uint8),
+        'flags': np.array([0, FLAG_EXTENDED_ID, FLAG_REMOTE_FRAME, FLAG_ERROR_FRAME], dtype=np.uint8),
+        'data': np.zeros((4, 8), dtype=np.uint8),
+        'meta': meta if meta is not None else {},
+    }
+    capture['data'][0] = [1, 2, 3, 4, 5, 6, 7, 8]
+    capture['data'][1, :3] = [0xAA, 0xBB, 0xCC]
+    capture['data'][3, :2] = [0x00, 0x01]
+    return capture
+
+
+def make_empty_capture():
+    """Build a capture with no messages."""
+    return {
+        'timestamp': np.empty(0, dtype=np.float64),
+        'arbitration_id': np.empty(0, dtype=np.uint32),
+        'dlc': np.empty(0, dtype=np.uint8),
+        'flags': np.empty(0, dtype=np.uint8),
+        'data': np.empty((0, 8), dtype=np.uint8),
+        'meta': {},
+    }
+
+
+def assert_same_capture(loaded, expected):
+    """Check that a loaded capture has the same arrays and metadata as the original."""
+    for field in CAPTURE_RECORD_DTYPE.names:
+        assert loaded[field].dtype == expected[field].dtype, field
+        np.testing.assert_array_equal(loaded[field], expected[field], err_msg=field)
+    assert loaded['meta'] == expected['meta']
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    """Analyzer saving into a temporary sessions directory."""
+    monkeypatch.chdir(tmp_path)
+    return CANActionAnalyzer("test")
+
+
+def save_and_load(analyzer, name, capture):
+    """Save a capture with the analyzer's current format and load it back."""
+    analyzer.captures[name] = capture
+    analyzer.save_capture(name)
+    filenames = os.listdir(analyzer.sessions_dir)
+    assert len(filenames) == 1
+    loaded_name = analyzer.load_capture(os.path.join(analyzer.sessions_dir, filenames[0]))
+    assert loaded_name.endswith(name)
+    return analyzer.captures[loaded_name]
+
+
+@pytest.mark.parametrize('meta', [
+    {},
+    {'action_timestamps': [0, 0.5, 1.0]},
+    {
+        'toggle_events': [{'timestamp': 0.5, 'from_state': 'off', 'to_state': 'on'}],
+        'initial_state': 'off',
+        'toggled_state': 'on',
+        'capture_type': 'binary_toggle',
+    },
+])
+def test_can_file_round_trip(analyzer, meta):
+    capture = make_capture(meta)
+    assert_same_capture(save_and_load(analyzer, 'action', capture), capture)
+
+
+def test_can_file_empty_capture(analyzer):
+    capture = make_empty_capture()
+    assert_same_capture(save_and_load(analyzer, 'empty', capture), capture)
+
+
+@pytest.mark.parametrize('make', [make_capture, make_empty_capture])
+def test_parquet_round_trip(analyzer, make):
+    pytest.importorskip('pyarrow')
+    analyzer.use_parquet = True
+    capture = make()
+    assert_same_capture(save_and_load(analyzer, 'action', capture), capture)
+
+
+def write_legacy_json(path, capture, with_meta):
+    """Write a capture in the JSON format used before binary capture files."""
+    messages = []
+    if with_meta:
+        messages.append(dict(capture['meta']))
+    for i in range(len(capture['timestamp'])):
+        flags = int(capture['flags'][i])
+        dlc = int(capture['dlc'][i])
+        messages.append({
+            'timestamp': float(capture['timestamp'][i]),
+            'arbitration_id': int(capture['arbitration_id'][i]),
+            'is_extended_id': bool(flags & FLAG_EXTENDED_ID),
+            'is_remote_frame': bool(flags & FLAG_REMOTE_FRAME),
+            'is_error_frame': bool(flags & FLAG_ERROR_FRAME),
+            'dlc': dlc,
+            'data': capture['data'][i, :dlc].tolist(),
+        })
+    with open(path, 'w') as f:
+        json.dump(messages, f, indent=2)
+
+
+@pytest.mark.parametrize('with_meta', [False, True])
+def test_legacy_json_load(analyzer, with_meta):
+    capture = make_capture({'action_timestamps': [0, 0.5]} if with_meta else {})
+    path = os.path.join(analyzer.sessions_dir, '20250101_120000_lock.json')
+    write_legacy_json(path, capture, with_meta)
+    name = analyzer.load_capture(path)
+    assert_same_capture(analyzer.captures[name], capture)
+
+
+def test_legacy_json_empty(analyzer):
+    path = os.path.join(analyzer.sessions_dir, '20250101_120000_empty.json')
+    write_legacy_json(path, make_empty_capture(), False)
+    name = analyzer.load_capture(path)
+    assert_same_capture(analyzer.captures[name], make_empty_capture())
+
+
+def test_can_file_format(analyzer):
+    """The .can format is one JSON header line followed by packed records."""
+    capture = make_capture({'action_timestamps': [0, 0.5]})
+    analyzer.captures['action'] = capture
+    analyzer.save_capture('action')
+    filename, = os.listdir(analyzer.sessions_dir)
+    assert filename.endswith(can_action_analyzer.CAPTURE_EXTENSION)
+    with open(os.path.join(analyzer.sessions_dir, filename), 'rb') as f:
+        header = json.loads(f.readline())
+        body = f.read()
+    assert header == {
+        'version': can_action_analyzer.CAPTURE_FORMAT_VERSION,
+        'count': 4,
+        'meta': {'action_timestamps': [0, 0.5]},
+    }
+    assert len(body) == 4 * CAPTURE_RECORD_DTYPE.itemsize
@@ -21,12 +21,19 @@ import argparse
 import sys
 import time
 import os
+import io
 from datetime import datetime
 import can
 import cantools
 import threading
 from collections import defaultdict
 
+try:
+    from cantools.database.namedsignalvalue import NamedSignalValue
+except ImportError:
+    # Older cantools releases define it alongside Signal
+    from cantools.database.can.signal import NamedSignalValue
+
 # Dashboard configuration - easily modify which messages and signals to display
 DASHBOARD_CONFIG = {
     "BCM_Lamp_Stat_FD1": {
@@ -51,6 +58,10 @@ DASHBOARD_CONFIG = {
     },
 }
 
+# Seconds between dashboard redraws on a terminal, and when stdout is redirected
+DISPLAY_INTERVAL = 0.5
+REDIRECTED_DISPLAY_INTERVAL = 5.0
+
 
 class CANDashboard:
     def __init__(self, can_interface, dbc_file="ford_lincoln_base_pt.dbc", two_column_mode=False):
@@ -64,14 +75,19 @@ class CANDashboard:
         self.can_interface = can_interface
         self.dbc_file = dbc_file
         self.bus = None
+        self.reader = None
+        self.notifier = None
         self.db = None
         self.running = False
-        self.start_time = time.time()
+        self.start_time_ns = time.monotonic_ns()
         
         # Message tracking
         self.message_data = {}  # {msg_name: {signal_name: value, ...}}
-        self.message_timestamps = {}  # {msg_name: last_update_time}
+        self.message_timestamps = {}  # {msg_name: last_update_time (monotonic ns)}
         self.message_ids = {}  # {frame_id: msg_name}
+        self.decoders = {}  # {frame_id: (msg_name, decode function, configured signal names)}
+        self.last_decoded = {}  # {frame_id: (packed payload, decoded data)}
+        self.applied_data = {}  # {msg_name: decoded data last copied into message_data}
         self.filtered_message_ids = set()
         
         # Statistics
@@ -85,6 +101,9 @@ class CANDashboard:
         self.data_lock = threading.Lock()
         self.two_column_mode = two_column_mode
         
+        # Only clear and redraw rapidly when someone is watching a terminal
+        self.interactive = sys.stdout.isatty()
+        
         print(f"CAN Dashboard initialized")
         print(f"Interface: {can_interface}")
         print(f"DBC file: {dbc_file}")
@@ -131,6 +150,10 @@ class CANDashboard:
                     if missing_signals:
                         print(f"    WARNING: {len(missing_signals)} signal(s) not found in DBC")
                     
+                    # Everything decode_message needs for this ID, looked up once
+                    signal_names = tuple(name for name in config['signals'] if name not in missing_signals)
+                    self.decoders[msg.frame_id] = (msg_name, msg.decode, signal_names)
+                    
                 except KeyError:
                     print(f"  - WARNING: Message '{msg_name}' not found in DBC")
             
@@ -146,16 +169,22 @@ class CANDashboard:
             return False
 
     def build_can_filters(self):
-        """Build CAN filters for the python-can Bus."""
+        """
+        Build CAN filters for the python-can Bus.
+        
+        On SocketCAN these are applied by the kernel, so frames with other IDs
+        never reach Python. IDs above 0x7FF are matched as 29-bit extended IDs.
+        """
         if not self.filtered_message_ids:
             return None
         
         filters = []
         for can_id in self.filtered_message_ids:
+            extended = can_id > 0x7FF
             filters.append({
                 "can_id": can_id,
-                "can_mask": 0x7FF,
-                "extended": False
+                "can_mask": 0x1FFFFFFF if extended else 0x7FF,
+                "extended": extended
             })
         
         return filters
@@ -191,33 +220,38 @@ class CANDashboard:
         Returns:
             dict: Decoded message data or None if not in config
         """
+        # Check if this message is in our dashboard config
+        decoder = self.decoders.get(msg.arbitration_id)
+        if decoder is None:
+            return None
+        
+        # A payload identical to the previous frame of this ID decodes to the same
+        # values, so compare it packed into one integer and reuse the last result
+        payload = (int.from_bytes(msg.data, 'little') << 8) | len(msg.data)
+        last = self.last_decoded.get(msg.arbitration_id)
+        if last is not None and last[0] == payload:
+            return last[1]
+        
+        msg_name, decode, signal_names = decoder
+        
+        # Decode the message
         try:
-            # Check if this message is in our dashboard config
-            if msg.arbitration_id not in self.message_ids:
-                return None
-            
-            msg_name = self.message_ids[msg.arbitration_id]
-            
-            # Find the message definition in the DBC
-            dbc_message = self.db.get_message_by_frame_id(msg.arbitration_id)
-            
-            # Decode the message
-            decoded_signals = dbc_message.decode(msg.data)
-            
-            # Filter to only the signals we care about
-            config = DASHBOARD_CONFIG[msg_name]
-            filtered_signals = {}
-            for signal_name in config['signals']:
-                if signal_name in decoded_signals:
-                    filtered_signals[signal_name] = decoded_signals[signal_name]
-            
-            return {
-                'message_name': msg_name,
-                'signals': filtered_signals
-            }
-            
+            decoded_signals = decode(msg.data)
         except Exception as e:
             return None
+        
+        # Filter to only the signals we care about
+        filtered_signals = {}
+        for signal_name in signal_names:
+            if signal_name in decoded_signals:
+                filtered_signals[signal_name] = decoded_signals[signal_name]
+        
+        decoded_data = {
+            'message_name': msg_name,
+            'signals': filtered_signals
+        }
+        self.last_decoded[msg.arbitration_id] = (payload, decoded_data)
+        return decoded_data
 
     def update_dashboard_data(self, msg, decoded_data):
         """Update the dashboard data with new message information."""
@@ -227,12 +261,15 @@ class CANDashboard:
         msg_name = decoded_data['message_name']
         
         with self.data_lock:
-            # Update signal values
-            for signal_name, value in decoded_data['signals'].items():
-                self.message_data[msg_name][signal_name] = value
+            # Update signal values; decode_message hands back the same dict for a
+            # repeated payload, and its values are already stored
+            if decoded_data is not self.applied_data.get(msg_name):
+                self.applied_data[msg_name] = decoded_data
+                for signal_name, value in decoded_data['signals'].items():
+                    self.message_data[msg_name][signal_name] = value
             
             # Update timestamp
-            self.message_timestamps[msg_name] = time.time()
+            self.message_timestamps[msg_name] = time.monotonic_ns()
             self.stats['dashboard_updates'] += 1
 
     def format_signal_value(self, value):
@@ -245,7 +282,7 @@ class CANDashboard:
             return str(value)
         elif isinstance(value, float):
             return f"{value:.2f}"
-        elif hasattr(value, 'name') and hasattr(value, 'value'):
+        elif isinstance(value, NamedSignalValue):
             # Handle NamedSignalValue objects
             return f"{value.name} ({value.value})"
         else:
@@ -257,18 +294,23 @@ class CANDashboard:
 
     def display_dashboard(self):
         """Display the current dashboard state."""
-        self.clear_screen()
+        if self.interactive:
+            self.clear_screen()
+        
+        current_time_ns = time.monotonic_ns()
+        runtime = (current_time_ns - self.start_time_ns) / 1e9
         
-        current_time = time.time()
-        runtime = current_time - self.start_time
+        # Build the whole frame in memory and write it with a single call, rather
+        # than one write per line on a line-buffered terminal
+        frame = io.StringIO()
         
         # Header
-        print("=" * 80 if not self.two_column_mode else "=" * 200)
-        print(f"{'CAN SIGNAL DASHBOARD':^80}" if not self.two_column_mode else f"{'CAN SIGNAL DASHBOARD':^200}")
-        print("=" * 80 if not self.two_column_mode else "=" * 200)
-        print(f"Interface: {self.can_interface:<20} Runtime: {runtime:>8.1f}s")
-        print(f"Messages: {self.stats['total_messages']:<12} Decoded: {self.stats['decoded_messages']:<12} Updates: {self.stats['dashboard_updates']}")
-        print("=" * 80 if not self.two_column_mode else "=" * 200)
+        print("=" * 80 if not self.two_column_mode else "=" * 200, file=frame)
+        print(f"{'CAN SIGNAL DASHBOARD':^80}" if not self.two_column_mode else f"{'CAN SIGNAL DASHBOARD':^200}", file=frame)
+        print("=" * 80 if not self.two_column_mode else "=" * 200, file=frame)
+        print(f"Interface: {self.can_interface:<20} Runtime: {runtime:>8.1f}s", file=frame)
+        print(f"Messages: {self.stats['total_messages']:<12} Decoded: {self.stats['decoded_messages']:<12} Updates: {self.stats['dashboard_updates']}", file=frame)
+        print("=" * 80 if not self.two_column_mode else "=" * 200, file=frame)
         
         # Dashboard data
         with self.data_lock:
@@ -279,15 +321,15 @@ class CANDashboard:
 
             def display_column(column):
                 for msg_name in column:
-                    print(f"\n📊 {msg_name}")
-                    print("-" * 60)
+                    print(f"\n📊 {msg_name}", file=frame)
+                    print("-" * 60, file=frame)
                     
                     # Check if we have recent data
                     last_update = self.message_timestamps.get(msg_name)
                     if last_update is None:
-                        print("   Status: Waiting for data...")
+                        print("   Status: Waiting for data...", file=frame)
                     else:
-                        age = current_time - last_update
+                        age = (current_time_ns - last_update) / 1e9
                         if age > 5.0:  # No data for 5 seconds
                             status = f"⚠️  STALE (last: {age:.1f}s ago)"
                         elif age > 1.0:  # No data for 1 second
@@ -295,14 +337,14 @@ class CANDashboard:
                         else:
                             status = "✅ LIVE"
                         
-                        print(f"   Status: {status}")
+                        print(f"   Status: {status}", file=frame)
                     
                     # Display signals
                     config = DASHBOARD_CONFIG[msg_name]
                     for signal_name in config['signals']:
                         value = self.message_data[msg_name].get(signal_name)
                         formatted_value = self.format_signal_value(value)
-                        print(f"   {signal_name:<25}: {formatted_value}")
+                        print(f"   {signal_name:<25}: {formatted_value}", file=frame)
 
             if self.two_column_mode:
                 left_output = []
@@ -315,7 +357,7 @@ class CANDashboard:
                     if last_update is None:
                         left_output.append("   Status: Waiting for data...")
                     else:
-                        age = current_time - last_update
+                        age = (current_time_ns - last_update) / 1e9
                         if age > 5.0:  # No data for 5 seconds
                             status = f"⚠️  STALE (last: {age:.1f}s ago)"
                             left_output.append(f"   Status: {status}")
@@ -341,7 +383,7 @@ class CANDashboard:
                     if last_update is None:
                         right_output.append("   Status: Waiting for data...")
                     else:
-                        age = current_time - last_update
+                        age = (current_time_ns - last_update) / 1e9
                         if age > 5.0:  # No data for 5 seconds
                             status = f"⚠️  STALE (last: {age:.1f}s ago)"
                             right_output.append(f"   Status: {status}")
@@ -363,18 +405,20 @@ class CANDashboard:
                 for i in range(max(len(left_output), len(right_output))):
                     left_line = left_output[i] if i < len(left_output) else ""
                     right_line = right_output[i] if i < len(right_output) else ""
-                    print(f"{left_line:<80}  {right_line}")
+                    print(f"{left_line:<80}  {right_line}", file=frame)
             else:
                 display_column(messages)
 
-        print("\n" + "=" * 80 if not self.two_column_mode else "=" * 200)
-        print("Press Ctrl+C to stop")
+        print("\n" + "=" * 80 if not self.two_column_mode else "=" * 200, file=frame)
+        print("Press Ctrl+C to stop", file=frame)
+        sys.stdout.write(frame.getvalue())
+        sys.stdout.flush()
 
     def message_listener(self):
         """Background thread to listen for CAN messages."""
         while self.running:
             try:
-                msg = self.bus.recv(timeout=1.0)
+                msg = self.reader.get_message(timeout=1.0)
                 
                 if msg:
                     self.stats['total_messages'] += 1
@@ -399,6 +443,11 @@ class CANDashboard:
         if not self.connect_can():
             return False
         
+        # python-can's notifier thread reads frames from the bus as they arrive
+        # and buffers them for the listener thread to decode
+        self.reader = can.BufferedReader()
+        self.notifier = can.Notifier(self.bus, [self.reader])
+        
         # Start message listening thread
         self.running = True
         listener_thread = threading.Thread(target=self.message_listener, daemon=True)
@@ -407,10 +456,12 @@ class CANDashboard:
         print("\nStarting dashboard...")
         time.sleep(2)  # Give a moment for initial data
         
+        display_interval = DISPLAY_INTERVAL if self.interactive else REDIRECTED_DISPLAY_INTERVAL
+        
         try:
             while True:
                 self.display_dashboard()
-                time.sleep(0.5)  # Update dashboard every 500ms
+                time.sleep(display_interval)
                 
         except KeyboardInterrupt:
             print(f"\n\nReceived Ctrl+C, stopping dashboard...")
@@ -419,7 +470,7 @@ class CANDashboard:
             self.running = False
             
             # Final statistics
-            runtime = time.time() - self.start_time
+            runtime = (time.monotonic_ns() - self.start_time_ns) / 1e9
             print(f"\n" + "="*80)
             print(f"DASHBOARD SESSION SUMMARY")
             print(f"="*80)
@@ -431,6 +482,8 @@ class CANDashboard:
                 print(f"Message rate: {self.stats['total_messages']/runtime:.1f} msg/sec")
             
             # Close resources
+            if self.notifier:
+                self.notifier.stop()
             if self.bus:
                 self.bus.shutdown()
                 print(f"Disconnected from {self.can_interface}")
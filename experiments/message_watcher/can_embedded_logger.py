@@ -24,7 +24,9 @@ import time
 import struct
 from datetime import datetime
 import socket
+import select
 import threading
+import queue
 
 # CAN message definitions - hard-coded from minimal.dbc for efficiency
 CAN_MESSAGES = {
@@ -63,6 +65,15 @@ CAN_MESSAGES = {
 # Pre-compute CAN filter for SocketCAN
 CAN_FILTER_IDS = list(CAN_MESSAGES.keys())
 
+# Maximum number of decoded messages waiting to be written to the log
+LOG_QUEUE_SIZE = 10000
+
+# Maximum number of queued messages written to stdout per write call
+LOG_BATCH_SIZE = 128
+
+# Output buffer size when stdout is redirected to a file (bytes)
+LOG_BUFFER_SIZE = 1 << 20
+
 
 class EmbeddedCANLogger:
     """Minimal resource CAN logger for embedded systems."""
@@ -70,7 +81,7 @@ class EmbeddedCANLogger:
     def __init__(self, can_interface):
         self.can_interface = can_interface
         self.running = False
-        self.start_time = time.time()
+        self.start_time_ns = time.monotonic_ns()
         
         # Signal state tracking - pre-allocated to avoid runtime allocation
         self.signal_values = {}
@@ -84,12 +95,28 @@ class EmbeddedCANLogger:
             for signal_name in msg_def['signals']:
                 self.signal_values[msg_name][signal_name] = None
         
+        # Per-message decoders with signal bit positions resolved up front
+        self.decoders = {}
+        for can_id, msg_def in CAN_MESSAGES.items():
+            self.decoders[can_id] = self.build_decoder(msg_def)
+        
+        # Formatted "CAN_ID:0xXXX | data:" log line fields, keyed by CAN ID
+        self.line_prefixes = {}
+        
+        # Log timestamp date/time prefix and the epoch second it was formatted for
+        self.timestamp_second = None
+        self.timestamp_prefix = None
+        
         # Statistics
-        self.stats = {'total_messages': 0, 'decoded_messages': 0, 'log_entries': 0}
+        self.stats = {'total_messages': 0, 'decoded_messages': 0, 'log_entries': 0, 'dropped_entries': 0}
         
         # Threading
         self.data_lock = threading.Lock()
         
+        # Decoded messages are handed from the listener thread to the main thread,
+        # which formats and writes them, so slow output never delays reception
+        self.log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        
         print(f"Embedded CAN Logger initialized", file=sys.stderr)
         print(f"Interface: {can_interface}", file=sys.stderr)
         print(f"Mode: Per-message logging", file=sys.stderr)
@@ -120,6 +147,52 @@ class EmbeddedCANLogger:
         
         return value
 
+    def build_decoder(self, msg_def):
+        """
+        Build a decoder function for one message definition.
+        
+        The function is generated as straight-line Python source with every
+        signal's shift and mask written in as constants, so decoding a frame is
+        one integer conversion plus a shift, mask and (for enumerated signals)
+        a tuple index per signal, with no loop or lookups in the signal table.
+        
+        Args:
+            msg_def: Message definition from CAN_MESSAGES
+            
+        Returns:
+            function: Takes an 8-byte payload and returns the decoded message dict
+        """
+        namespace = {'msg_name': msg_def['name']}
+        fields = []
+        for i, (signal_name, signal_def) in enumerate(msg_def['signals'].items()):
+            length = signal_def['length']
+            shift = signal_def['start_bit'] - length + 1
+            expression = f"(data_int >> {shift}) & {(1 << length) - 1:#x}"
+            
+            # Value mappings become a table indexed by the raw value, covering
+            # every possible raw value (unmapped ones decode as "Unknown(n)")
+            values = signal_def['values']
+            if values is not None:
+                table_name = f"values_{i}"
+                namespace[table_name] = tuple(values.get(raw_value, f"Unknown({raw_value})")
+                                              for raw_value in range(1 << length))
+                expression = f"{table_name}[{expression}]"
+            
+            fields.append(f"            {signal_name!r}: {expression},\n")
+        
+        source = (
+            "def decode(data):\n"
+            "    data_int = int.from_bytes(data, byteorder='little')\n"
+            "    return {\n"
+            "        'message_name': msg_name,\n"
+            "        'signals': {\n"
+            + "".join(fields) +
+            "        }\n"
+            "    }\n"
+        )
+        exec(compile(source, f"<decoder {msg_def['name']}>", 'exec'), namespace)
+        return namespace['decode']
+
     def decode_can_message(self, can_id, data):
         """
         Decode CAN message using hard-coded signal definitions.
@@ -131,26 +204,11 @@ class EmbeddedCANLogger:
         Returns:
             dict: Decoded signals or None if message not monitored
         """
-        if can_id not in CAN_MESSAGES:
+        decoder = self.decoders.get(can_id)
+        if decoder is None:
             return None
-            
-        msg_def = CAN_MESSAGES[can_id]
-        decoded_signals = {}
         
-        # Extract each signal
-        for signal_name, signal_def in msg_def['signals'].items():
-            raw_value = self.extract_signal_value(data, signal_def['start_bit'], signal_def['length'])
-            
-            # Apply value mapping if available
-            if signal_def['values'] is not None:
-                decoded_signals[signal_name] = signal_def['values'].get(raw_value, f"Unknown({raw_value})")
-            else:
-                decoded_signals[signal_name] = raw_value
-        
-        return {
-            'message_name': msg_def['name'],
-            'signals': decoded_signals
-        }
+        return decoder(data)
 
     def connect_can_socket(self):
         """Connect to CAN interface using raw SocketCAN."""
@@ -158,17 +216,23 @@ class EmbeddedCANLogger:
             # Create raw CAN socket
             self.can_socket = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
             
-            # Set CAN filters for efficiency
+            # Set CAN filters for efficiency; the kernel drops all other frames
             can_filter = b""
             for can_id in CAN_FILTER_IDS:
-                # Pack filter: can_id, can_mask (exact match)
-                can_filter += struct.pack("=II", can_id, 0x7FF)
+                # Pack filter: can_id, can_mask (exact match on the ID and frame
+                # format, so extended frames sharing the low 11 bits are rejected)
+                if can_id > socket.CAN_SFF_MASK:
+                    can_filter += struct.pack("=II", can_id | socket.CAN_EFF_FLAG,
+                                              socket.CAN_EFF_MASK | socket.CAN_EFF_FLAG | socket.CAN_RTR_FLAG)
+                else:
+                    can_filter += struct.pack("=II", can_id,
+                                              socket.CAN_SFF_MASK | socket.CAN_EFF_FLAG | socket.CAN_RTR_FLAG)
             
             self.can_socket.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, can_filter)
             
             # Bind to interface
             self.can_socket.bind((self.can_interface,))
-            self.can_socket.settimeout(1.0)
+            self.can_socket.setblocking(False)
             
             print(f"Connected to {self.can_interface} with filters for {len(CAN_FILTER_IDS)} message IDs", file=sys.stderr)
             return True
@@ -183,12 +247,12 @@ class EmbeddedCANLogger:
             return
             
         msg_name = decoded_data['message_name']
-        current_time = time.time()
+        current_time_ns = time.monotonic_ns()
         
         with self.data_lock:
             for signal_name, value in decoded_data['signals'].items():
                 self.signal_values[msg_name][signal_name] = value
-            self.message_timestamps[msg_name] = current_time
+            self.message_timestamps[msg_name] = current_time_ns
 
     def format_signal_value(self, value):
         """Format signal value for logging output."""
@@ -228,63 +292,95 @@ class EmbeddedCANLogger:
         print(log_line)
         self.stats['log_entries'] += 1
 
-    def log_can_message(self, can_id, data, decoded_data):
-        """Log a single CAN message with both raw and decoded data."""
-        current_time = time.time()
-        timestamp = datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    def format_can_message(self, can_id, data, decoded_data, receive_time=None):
+        """
+        Format a single CAN message as a log line with both raw and decoded data.
+        
+        Returns:
+            str: Log line, without a trailing newline
+        """
+        current_time = receive_time if receive_time is not None else time.time()
+        
+        # Format the date and time once per second and only add milliseconds per message
+        second = int(current_time)
+        microsecond = round((current_time - second) * 1000000)
+        if microsecond == 1000000:
+            second += 1
+            microsecond = 0
+        if second != self.timestamp_second:
+            self.timestamp_second = second
+            self.timestamp_prefix = datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = f"{self.timestamp_prefix}.{microsecond // 1000:03d}"
         
-        # Format raw data as hex bytes
-        data_hex = " ".join(f"{byte:02X}" for byte in data)
+        # The CAN ID and data label only depend on the ID, so format them once per ID
+        prefix = self.line_prefixes.get(can_id)
+        if prefix is None:
+            prefix = self.line_prefixes[can_id] = f"CAN_ID:0x{can_id:03X} | data:"
         
-        # Build log line with raw message info
-        log_parts = [
-            timestamp,
-            f"CAN_ID:0x{can_id:03X}",
-            f"data:{data_hex}"
-        ]
+        # Build log line with raw message info, formatting the data as hex bytes
+        log_line = f"{timestamp} | {prefix}{data.hex(' ').upper()}"
         
         if decoded_data:
             # Add decoded message name
-            log_parts.append(decoded_data['message_name'])
+            log_line += " | " + decoded_data['message_name']
             
             # Add decoded signals
-            signal_parts = []
-            for signal_name, value in decoded_data['signals'].items():
-                formatted_value = self.format_signal_value(value)
-                signal_parts.append(f"{signal_name}={formatted_value}")
-            
+            signal_parts = [
+                f"{signal_name}={self.format_signal_value(value)}"
+                for signal_name, value in decoded_data['signals'].items()
+            ]
             if signal_parts:
-                log_parts.append(" ".join(signal_parts))
+                log_line += " | " + " ".join(signal_parts)
         else:
-            log_parts.append("UNKNOWN_MESSAGE")
+            log_line += " | UNKNOWN_MESSAGE"
         
-        log_line = " | ".join(log_parts)
-        print(log_line)
-        self.stats['log_entries'] += 1
+        return log_line
+
+    def write_log_batch(self, entries):
+        """Format queued messages and write them to stdout in a single call."""
+        sys.stdout.writelines([self.format_can_message(*entry) + "\n" for entry in entries])
+        self.stats['log_entries'] += len(entries)
+
+    def handle_frame(self, frame_data):
+        """Decode a raw SocketCAN frame and queue it for logging if it is monitored."""
+        if len(frame_data) < 16:
+            return
+        
+        # Unpack CAN frame
+        can_id, dlc = struct.unpack("=IB", frame_data[:5])
+        can_id &= socket.CAN_EFF_MASK  # Strip frame format flags
+        data = frame_data[8:16]  # 8 bytes of data
+        
+        self.stats['total_messages'] += 1
+        
+        # Decode if this is a monitored message
+        decoded_data = self.decode_can_message(can_id, data)
+        if decoded_data:
+            self.stats['decoded_messages'] += 1
+            self.update_signal_data(decoded_data)
+            try:
+                self.log_queue.put_nowait((can_id, data, decoded_data, time.time()))
+            except queue.Full:
+                self.stats['dropped_entries'] += 1
 
     def message_listener(self):
         """Background thread for CAN message reception."""
         while self.running:
             try:
-                # Receive CAN frame: can_id(4) + dlc(1) + pad(3) + data(8)
-                frame_data = self.can_socket.recv(16)
-                if len(frame_data) >= 16:
-                    # Unpack CAN frame
-                    can_id, dlc = struct.unpack("=IB", frame_data[:5])
-                    can_id &= 0x7FF  # Mask to standard 11-bit ID
-                    data = frame_data[8:16]  # 8 bytes of data
-                    
-                    self.stats['total_messages'] += 1
+                # Wait up to a second for frames, then read every frame already
+                # queued on the non-blocking socket before waiting again
+                readable, _, _ = select.select([self.can_socket], [], [], 1.0)
+                if not readable:
+                    continue  # Normal timeout, keep listening
+                
+                while True:
+                    try:
+                        # Receive CAN frame: can_id(4) + dlc(1) + pad(3) + data(8)
+                        frame_data = self.can_socket.recv(16)
+                    except BlockingIOError:
+                        break
+                    self.handle_frame(frame_data)
                     
-                    # Decode if this is a monitored message
-                    decoded_data = self.decode_can_message(can_id, data)
-                    if decoded_data:
-                        self.stats['decoded_messages'] += 1
-                        self.update_signal_data(decoded_data)
-                        self.log_can_message(can_id, data, decoded_data)
-                        
-            except socket.timeout:
-                continue  # Normal timeout, keep listening
             except Exception as e:
                 if self.running:
                     print(f"Error in message listener: {e}", file=sys.stderr)
@@ -301,12 +397,35 @@ class EmbeddedCANLogger:
         listener_thread.start()
         
         print(f"Starting logger in per-message mode...", file=sys.stderr)
+        
+        # When redirected to a log file, the default 8 KiB buffer would still write
+        # every ~80 lines, so swap in one large enough to hold a second of output
+        # (flushed once per second below); the original stdout is restored on exit
+        original_stdout = sys.stdout
+        if not sys.stdout.isatty():
+            sys.stdout.flush()
+            sys.stdout = open(sys.stdout.fileno(), 'w', buffering=LOG_BUFFER_SIZE,
+                              encoding=sys.stdout.encoding, closefd=False)
         self.log_header()
         
         try:
+            next_flush = time.monotonic() + 1.0
             while True:
-                # Just wait for messages to be logged by the listener thread
-                time.sleep(1.0)
+                # Write messages queued by the listener thread, in batches of
+                # whatever has accumulated (up to LOG_BATCH_SIZE)
+                batch = []
+                try:
+                    batch.append(self.log_queue.get(timeout=1.0))
+                    while len(batch) < LOG_BATCH_SIZE:
+                        batch.append(self.log_queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if batch:
+                    self.write_log_batch(batch)
+                
+                if time.monotonic() >= next_flush:
+                    sys.stdout.flush()
+                    next_flush = time.monotonic() + 1.0
                 
         except KeyboardInterrupt:
             print(f"\nStopping logger...", file=sys.stderr)
@@ -314,13 +433,30 @@ class EmbeddedCANLogger:
         finally:
             self.running = False
             
+            # Wait for the listener to notice (it checks running at least once a
+            # second), then write whatever it queued before it stopped
+            listener_thread.join(timeout=2.0)
+            batch = []
+            try:
+                while True:
+                    batch.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                pass
+            self.write_log_batch(batch)
+            sys.stdout.flush()
+            if sys.stdout is not original_stdout:
+                sys.stdout.close()
+                sys.stdout = original_stdout
+            
             # Print final statistics
-            runtime = time.time() - self.start_time
+            runtime = (time.monotonic_ns() - self.start_time_ns) / 1e9
             print(f"\nSESSION SUMMARY", file=sys.stderr)
             print(f"Runtime: {runtime:.1f}s", file=sys.stderr)
             print(f"Total messages: {self.stats['total_messages']}", file=sys.stderr)
             print(f"Decoded messages: {self.stats['decoded_messages']}", file=sys.stderr)
             print(f"Log entries: {self.stats['log_entries']}", file=sys.stderr)
+            if self.stats['dropped_entries']:
+                print(f"Dropped log entries (queue full): {self.stats['dropped_entries']}", file=sys.stderr)
             if runtime > 0:
                 print(f"Message rate: {self.stats['total_messages']/runtime:.1f} msg/sec", file=sys.stderr)
             
@@ -27,6 +27,12 @@ import can
 import cantools
 import threading
 
+try:
+    from cantools.database.namedsignalvalue import NamedSignalValue
+except ImportError:
+    # Older cantools releases define it alongside Signal
+    from cantools.database.can.signal import NamedSignalValue
+
 # Use the same configuration as the dashboard
 LOGGER_CONFIG = {
     "BCM_Lamp_Stat_FD1": {
@@ -58,14 +64,19 @@ class CANLogger:
         self.dbc_file = dbc_file
         self.log_interval = log_interval
         self.bus = None
+        self.reader = None
+        self.notifier = None
         self.db = None
         self.running = False
-        self.start_time = time.time()
+        self.start_time_ns = time.monotonic_ns()
         
         # Message tracking
         self.message_data = {}  # {msg_name: {signal_name: value, ...}}
-        self.message_timestamps = {}  # {msg_name: last_update_time}
+        self.message_timestamps = {}  # {msg_name: last_update_time (monotonic ns)}
         self.message_ids = {}  # {frame_id: msg_name}
+        self.decoders = {}  # {frame_id: (msg_name, decode function, configured signal names)}
+        self.last_decoded = {}  # {frame_id: (packed payload, decoded data)}
+        self.applied_data = {}  # {msg_name: decoded data last copied into message_data}
         self.filtered_message_ids = set()
         
         # Statistics
@@ -125,6 +136,10 @@ class CANLogger:
                     if missing_signals:
                         print(f"    WARNING: {len(missing_signals)} signal(s) not found in DBC", file=sys.stderr)
                     
+                    # Everything decode_message needs for this ID, looked up once
+                    signal_names = tuple(name for name in config['signals'] if name not in missing_signals)
+                    self.decoders[msg.frame_id] = (msg_name, msg.decode, signal_names)
+                    
                 except KeyError:
                     print(f"  - WARNING: Message '{msg_name}' not found in DBC", file=sys.stderr)
             
@@ -140,16 +155,22 @@ class CANLogger:
             return False
 
     def build_can_filters(self):
-        """Build CAN filters for the python-can Bus."""
+        """
+        Build CAN filters for the python-can Bus.
+        
+        On SocketCAN these are applied by the kernel, so frames with other IDs
+        never reach Python. IDs above 0x7FF are matched as 29-bit extended IDs.
+        """
         if not self.filtered_message_ids:
             return None
         
         filters = []
         for can_id in self.filtered_message_ids:
+            extended = can_id > 0x7FF
             filters.append({
                 "can_id": can_id,
-                "can_mask": 0x7FF,
-                "extended": False
+                "can_mask": 0x1FFFFFFF if extended else 0x7FF,
+                "extended": extended
             })
         
         return filters
@@ -185,33 +206,38 @@ class CANLogger:
         Returns:
             dict: Decoded message data or None if not in config
         """
+        # Check if this message is in our logger config
+        decoder = self.decoders.get(msg.arbitration_id)
+        if decoder is None:
+            return None
+        
+        # A payload identical to the previous frame of this ID decodes to the same
+        # values, so compare it packed into one integer and reuse the last result
+        payload = (int.from_bytes(msg.data, 'little') << 8) | len(msg.data)
+        last = self.last_decoded.get(msg.arbitration_id)
+        if last is not None and last[0] == payload:
+            return last[1]
+        
+        msg_name, decode, signal_names = decoder
+        
+        # Decode the message
         try:
-            # Check if this message is in our logger config
-            if msg.arbitration_id not in self.message_ids:
-                return None
-            
-            msg_name = self.message_ids[msg.arbitration_id]
-            
-            # Find the message definition in the DBC
-            dbc_message = self.db.get_message_by_frame_id(msg.arbitration_id)
-            
-            # Decode the message
-            decoded_signals = dbc_message.decode(msg.data)
-            
-            # Filter to only the signals we care about
-            config = LOGGER_CONFIG[msg_name]
-            filtered_signals = {}
-            for signal_name in config['signals']:
-                if signal_name in decoded_signals:
-                    filtered_signals[signal_name] = decoded_signals[signal_name]
-            
-            return {
-                'message_name': msg_name,
-                'signals': filtered_signals
-            }
-            
+            decoded_signals = decode(msg.data)
         except Exception as e:
             return None
+        
+        # Filter to only the signals we care about
+        filtered_signals = {}
+        for signal_name in signal_names:
+            if signal_name in decoded_signals:
+                filtered_signals[signal_name] = decoded_signals[signal_name]
+        
+        decoded_data = {
+            'message_name': msg_name,
+            'signals': filtered_signals
+        }
+        self.last_decoded[msg.arbitration_id] = (payload, decoded_data)
+        return decoded_data
 
     def update_message_data(self, msg, decoded_data):
         """Update the message data with new message information."""
@@ -221,12 +247,15 @@ class CANLogger:
         msg_name = decoded_data['message_name']
         
         with self.data_lock:
-            # Update signal values
-            for signal_name, value in decoded_data['signals'].items():
-                self.message_data[msg_name][signal_name] = value
+            # Update signal values; decode_message hands back the same dict for a
+            # repeated payload, and its values are already stored
+            if decoded_data is not self.applied_data.get(msg_name):
+                self.applied_data[msg_name] = decoded_data
+                for signal_name, value in decoded_data['signals'].items():
+                    self.message_data[msg_name][signal_name] = value
             
             # Update timestamp
-            self.message_timestamps[msg_name] = time.time()
+            self.message_timestamps[msg_name] = time.monotonic_ns()
 
     def format_signal_value(self, value):
         """Format a signal value for logging."""
@@ -238,7 +267,7 @@ class CANLogger:
             return str(value)
         elif isinstance(value, float):
             return f"{value:.2f}"
-        elif hasattr(value, 'name') and hasattr(value, 'value'):
+        elif isinstance(value, NamedSignalValue):
             # Handle NamedSignalValue objects
             return f"{value.name}({value.value})"
         else:
@@ -295,7 +324,7 @@ class CANLogger:
         """Background thread to listen for CAN messages."""
         while self.running:
             try:
-                msg = self.bus.recv(timeout=1.0)
+                msg = self.reader.get_message(timeout=1.0)
                 
                 if msg:
                     self.stats['total_messages'] += 1
@@ -320,6 +349,11 @@ class CANLogger:
         if not self.connect_can():
             return False
         
+        # python-can's notifier thread reads frames from the bus as they arrive
+        # and buffers them for the listener thread to decode
+        self.reader = can.BufferedReader()
+        self.notifier = can.Notifier(self.bus, [self.reader])
+        
         # Start message listening thread
         self.running = True
         listener_thread = threading.Thread(target=self.message_listener, daemon=True)
@@ -344,7 +378,7 @@ class CANLogger:
             self.running = False
             
             # Final statistics
-            runtime = time.time() - self.start_time
+            runtime = (time.monotonic_ns() - self.start_time_ns) / 1e9
             print(f"\nLOGGER SESSION SUMMARY", file=sys.stderr)
             print(f"="*50, file=sys.stderr)
             print(f"Runtime: {runtime:.1f} seconds", file=sys.stderr)
@@ -355,6 +389,8 @@ class CANLogger:
                 print(f"Message rate: {self.stats['total_messages']/runtime:.1f} msg/sec", file=sys.stderr)
             
             # Close resources
+            if self.notifier:
+                self.notifier.stop()
             if self.bus:
                 self.bus.shutdown()
                 print(f"Disconnected from {self.can_interface}", file=sys.stderr)
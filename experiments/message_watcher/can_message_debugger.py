@@ -21,6 +21,7 @@ Usage:
 import argparse
 import sys
 import re
+from itertools import islice
 
 # Import CAN message definitions and decoding logic from the embedded logger
 # CAN message definitions - hard-coded from minimal.dbc for efficiency
@@ -224,7 +225,7 @@ class CANMessageDebugger:
         print(f"CAN Message Debug Analysis")
         print(f"{'='*50}")
         print(f"CAN ID: 0x{can_id:03X} ({can_id})")
-        print(f"Data: {' '.join(f'{b:02X}' for b in data_bytes)}")
+        print(f"Data: {data_bytes.hex(' ').upper()}")
         print()
         
         # Check if this is a monitored message
@@ -325,7 +326,7 @@ Supported Messages:
             print(f"• 0x{can_id:03X} ({can_id}): {msg_def['name']}")
             for signal_name, signal_def in msg_def['signals'].items():
                 if signal_def['values']:
-                    values_str = ", ".join(f"{k}={v}" for k, v in list(signal_def['values'].items())[:3])
+                    values_str = ", ".join(f"{k}={v}" for k, v in islice(signal_def['values'].items(), 3))
                     if len(signal_def['values']) > 3:
                         values_str += "..."
                     print(f"    - {signal_name}: {values_str}")
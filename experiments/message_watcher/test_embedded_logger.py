@@ -6,13 +6,14 @@ This validates that our bit manipulation matches the DBC signal definitions.
 
 import sys
 import os
+import random
 sys.path.append(os.path.dirname(__file__))
 
-from can_embedded_logger import EmbeddedCANLogger
+from can_embedded_logger import EmbeddedCANLogger, CAN_MESSAGES
 
 def test_signal_extraction():
     """Test signal extraction with known test vectors."""
-    logger = EmbeddedCANLogger("test", 1.0)
+    logger = EmbeddedCANLogger("test")
     
     print("Testing signal extraction logic...")
     
@@ -23,6 +24,7 @@ def test_signal_extraction():
     
     value = logger.extract_signal_value(test_data_1, 11, 2)
     print(f"PudLamp_D_Rq extraction test: expected=2, got={value}")
+    assert value == 2
     
     # Test Battery_Mgmt_3_FD1 BSBattSOC (start_bit=22, length=7)
     # Example: 50% battery = 50 decimal = 0x32
@@ -33,6 +35,7 @@ def test_signal_extraction():
     
     value2 = logger.extract_signal_value(test_data_2, 22, 7)
     print(f"BSBattSOC extraction test: expected=50, got={value2}")
+    assert value2 == 50
     
     # Test a full decode
     decoded = logger.decode_can_message(0x43C, test_data_2)
@@ -40,8 +43,45 @@ def test_signal_extraction():
         print(f"Full decode test: {decoded}")
     else:
         print("Full decode test: No result")
+    assert decoded == {'message_name': 'Battery_Mgmt_3_FD1', 'signals': {'BSBattSOC': 50}}
     
     print("Signal extraction tests completed.")
 
+def reference_decode(logger, can_id, data):
+    """Decode a message signal by signal with extract_signal_value."""
+    msg_def = CAN_MESSAGES[can_id]
+    decoded_signals = {}
+    for signal_name, signal_def in msg_def['signals'].items():
+        raw_value = logger.extract_signal_value(data, signal_def['start_bit'], signal_def['length'])
+        if signal_def['values'] is not None:
+            decoded_signals[signal_name] = signal_def['values'].get(raw_value, f"Unknown({raw_value})")
+        else:
+            decoded_signals[signal_name] = raw_value
+    return {
+        'message_name': msg_def['name'],
+        'signals': decoded_signals
+    }
+
+def test_generated_decoders():
+    """Check every generated decoder against extract_signal_value over random payloads."""
+    logger = EmbeddedCANLogger("test")
+    rng = random.Random(0)
+    
+    print("Testing generated decoders...")
+    
+    payloads = [bytes(8), b'\xff' * 8]
+    payloads += [bytes(rng.getrandbits(8) for _ in range(8)) for _ in range(2000)]
+    for can_id in CAN_MESSAGES:
+        for data in payloads:
+            expected = reference_decode(logger, can_id, data)
+            assert logger.decode_can_message(can_id, data) == expected, (hex(can_id), data.hex())
+            assert logger.decode_can_message(can_id, bytearray(data)) == expected, (hex(can_id), data.hex())
+    
+    # Messages that are not monitored are not decoded
+    assert logger.decode_can_message(0x123, bytes(8)) is None
+    
+    print(f"Generated decoders match for {len(CAN_MESSAGES)} messages x {len(payloads)} payloads.")
+
 if __name__ == "__main__":
     test_signal_extraction()
+    test_generated_decoders()